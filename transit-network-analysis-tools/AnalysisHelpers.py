@@ -26,6 +26,7 @@ import subprocess
 import uuid
 import logging
 import traceback
+import itertools
 from concurrent import futures
 import arcpy
 
@@ -39,6 +40,10 @@ TIME_UNITS = ["Days", "Hours", "Minutes", "Seconds"]
 MAX_AGOL_PROCESSES = 4  # AGOL concurrent processes are limited so as not to overload the service for other users.
 MAX_ALLOWED_MAX_PROCESSES = 61  # Windows limitation for concurrent.futures ProcessPoolExecutor
 MAX_RETRIES = 3  # Max allowed retries if a parallel process errors (eg, temporary service glitch or read/write error)
+MAX_PENDING_JOBS_PER_PROCESS = 2  # Max jobs submitted to the process pool at a time for each parallel process
+# Number of jobs of start times to aim for per parallel process when splitting up the start times of a time window.
+# Using a few jobs per process instead of one keeps the processes evenly busy if some jobs take longer than others.
+TIME_GROUPS_PER_PROCESS = 4
 MAX_ALLOWED_FC_ROWS_32BIT = 2000000000  # Use a 64bit OID feature class if the row count is bigger than this
 TIME_FIELD = "TimeOfDay"  # Used for the output of Prepare Time Lapse Polygons
 # Create Percent Access Polygons: Field names that must be in the input time lapse polygons
@@ -48,6 +53,10 @@ FROM_BREAK_FIELD = "FromBreak"
 TO_BREAK_FIELD = "ToBreak"
 FIELDS_TO_PRESERVE = [FACILITY_ID_FIELD, NAME_FIELD, FROM_BREAK_FIELD, TO_BREAK_FIELD]
 
+# Inputs and objects shared by all jobs handled by a parallel worker process. The inputs are set once per process by
+# initialize_worker(), and the objects are created by get_worker_object() for the first job the worker handles.
+WORKER_CACHE = {}
+
 
 class TransitNetworkAnalysisToolsError(Exception):
     """Generic error class that can be raised for known problems in these tools."""
@@ -317,6 +326,30 @@ def make_analysis_time_of_day_list(start_day_input, end_day_input, start_time_in
     return timelist
 
 
+def split_list_into_groups(items, num_groups):
+    """Split a list into the designated number of contiguous groups of nearly equal size.
+
+    Args:
+        items (list): List to split
+        num_groups (int): Desired number of groups. Limited to the number of items in the list.
+
+    Returns:
+        list(list): List of groups. For example, splitting [1, 2, 3, 4, 5] into 2 groups returns [[1, 2, 3], [4, 5]].
+    """
+    if not items:
+        return []
+    num_groups = max(1, min(num_groups, len(items)))
+    group_size, remainder = divmod(len(items), num_groups)
+    groups = []
+    start = 0
+    for i in range(num_groups):
+        # The first groups get one extra item each until the remainder is used up
+        end = start + group_size + (1 if i < remainder else 0)
+        groups.append(items[start:end])
+        start = end
+    return groups
+
+
 def convert_inputs_to_datetimes(start_day_input, end_day_input, start_time_input, end_time_input):
     """Parse start and end day and time from tool inputs and convert them to datetimes."""
     # For an explanation of special generic weekday dates, see this documentation:
@@ -427,42 +460,28 @@ def cell_size_to_meters(cell_size_param_value):
     raise ValueError(f"Invalid cell size units: {units}")
 
 
-def get_oid_ranges_for_input(input_fc, max_chunk_size):
+def get_oid_ranges_for_input(input_fc, max_chunk_size, where=""):
     """Construct ranges of ObjectIDs for use in where clauses to split large data into chunks.
 
     Args:
         input_fc (str, layer): Data that needs to be split into chunks
         max_chunk_size (int): Maximum number of rows that can be in a chunk
+        where (str, optional): Where clause to use to filter data before chunking. Defaults to "".
 
     Returns:
         list: list of ObjectID ranges for the current dataset representing each chunk. For example,
             [[1, 1000], [1001, 2000], [2001, 2478]] represents three chunks of no more than 1000 rows.
     """
-    ranges = []
-    num_in_range = 0
-    current_range = [0, 0]
-    # Loop through all OIDs of the input and construct tuples of min and max OID for each chunk
+    # Read all OIDs of the input into a sorted array and construct tuples of min and max OID for each chunk
     # We do it this way and not by straight-up looking at the numerical values of OIDs to account
     # for definition queries, selection sets, or feature layers with gaps in OIDs
-    for row in arcpy.da.SearchCursor(input_fc, "OID@"):  # pylint: disable=no-member
-        oid = row[0]
-        if num_in_range == 0:
-            # Starting new range
-            current_range[0] = oid
-        # Increase the count of items in this range and set the top end of the range to the current oid
-        num_in_range += 1
-        current_range[1] = oid
-        if num_in_range == max_chunk_size:
-            # Finishing up a chunk
-            ranges.append(current_range)
-            # Reset range trackers
-            num_in_range = 0
-            current_range = [0, 0]
-    # After looping, close out the last range if we still have one open
-    if current_range != [0, 0]:
-        ranges.append(current_range)
-
-    return ranges
+    oids = arcpy.da.FeatureClassToNumPyArray(input_fc, "OID@", where)["OID@"]  # pylint: disable=no-member
+    oids.sort()
+    num_oids = len(oids)
+    return [
+        [int(oids[start]), int(oids[min(start + max_chunk_size, num_oids) - 1])]
+        for start in range(0, num_oids, max_chunk_size)
+    ]
 
 
 def run_gp_tool(log_to_use, tool, tool_args=None, tool_kwargs=None):
@@ -506,10 +525,14 @@ def run_gp_tool(log_to_use, tool, tool_args=None, tool_kwargs=None):
         if tool_kwargs is None:
             tool_kwargs = {}
         result = tool(*tool_args, **tool_kwargs)
-        info_msgs = [msg for msg in result.getMessages(0).splitlines() if msg]
+        # Info messages are only logged at the debug level. The main process's logger uses LOG_LEVEL, so skip retrieving
+        # them there when debug logging is off. Parallel process loggers always write debug messages to their log
+        # files, so they always retrieve them. Log them as one record instead of one record per message.
+        if log_to_use.isEnabledFor(logging.DEBUG):
+            info_msgs = [msg for msg in result.getMessages(0).splitlines() if msg]
+            if info_msgs:
+                log_to_use.debug("\n".join(info_msgs))
         warning_msgs = [msg for msg in result.getMessages(1).splitlines() if msg]
-        for msg in info_msgs:
-            log_to_use.debug(msg)
         for msg in warning_msgs:
             log_to_use.warning(msg)
     except arcpy.ExecuteError:
@@ -720,14 +743,51 @@ def configure_global_logger(log_level):
 
 def teardown_logger(logger):
     """Clean up and close the logger."""
-    for handler in logger.handlers:
+    # Loop over a copy of the list since handlers are removed from it along the way
+    for handler in logger.handlers[:]:
         handler.close()
         logger.removeHandler(handler)
 
 
+def initialize_worker(inputs):
+    """Store the inputs shared by all jobs handled by a parallel worker process.
+
+    Use this as the initializer for run_parallel_processes() so the inputs are sent to each worker process only once
+    instead of with every job. Only store the inputs here. An error raised in a process pool initializer breaks the
+    whole pool and can't be retried, so objects built from the inputs are created by get_worker_object() instead.
+
+    Args:
+        inputs (dict): Dictionary of keyword inputs for the factory passed to get_worker_object()
+    """
+    WORKER_CACHE.clear()
+    WORKER_CACHE["inputs"] = inputs
+
+
+def get_worker_object(factory, inputs=None):
+    """Return the object created by factory for this parallel worker process, creating it if needed.
+
+    If the worker process was set up with initialize_worker(), the object is created from the worker's inputs the first
+    time a job needs it and reused for every later job the worker handles. If creating it fails, the job fails and can
+    be retried. Otherwise, a new object is created from the given inputs.
+
+    Args:
+        factory (callable): Class or function called with the inputs as keyword arguments to create the object
+        inputs (dict, optional): Dictionary of keyword inputs for factory. Only used if the worker process was not set
+            up with initialize_worker().
+
+    Returns:
+        tuple: The object and whether it is shared by all jobs handled by the worker process
+    """
+    if "inputs" not in WORKER_CACHE:
+        return factory(**inputs), False
+    if factory not in WORKER_CACHE:
+        WORKER_CACHE[factory] = factory(**WORKER_CACHE["inputs"])
+    return WORKER_CACHE[factory], True
+
+
 def run_parallel_processes(
         logger, function_to_call, static_args, chunks, total_jobs, max_processes,
-        msg_intro_verb, msg_process_str
+        msg_intro_verb, msg_process_str, initializer=None, initargs=()
 ):
     """Launch and manage parallel processes and return a results dictionary.
 
@@ -736,11 +796,16 @@ def run_parallel_processes(
         function_to_call (function): Function called in each parallelized job
         static_args (list): List of values used as static arguments to the function_to_call
         chunks (iterator): Iterator with values that will be passed one at a time to the function_to_call, with each
-            value being one parallelized chunk.
+            value being one parallelized chunk. Chunks are only pulled from the iterator as jobs are submitted, so it
+            can be a lazy iterator.
         total_jobs (int): Total number of jobs that will be run. Used in messaging.
         max_processes (int): Maximum number of parallel processes allowed.
         msg_intro_verb (str): Text to include in the intro message f"{msg_intro_verb} in parallel..."
         msg_process_str (_type_): Text to include in messages representing whatever is being parallelized.
+        initializer (function, optional): Function called once when each worker process starts, such as
+            initialize_worker(). Use this to store inputs shared by all the chunks handled by that worker. Defaults to
+            None.
+        initargs (tuple, optional): Arguments passed to the initializer. Defaults to ().
 
     Returns:
         list: List of returned values from the parallel processes.
@@ -749,60 +814,78 @@ def run_parallel_processes(
     completed_jobs = 0  # Track the number of jobs completed so far to use in logging
     job_results = []
     # Use the concurrent.futures ProcessPoolExecutor to spin up parallel processes that call the function
-    with futures.ProcessPoolExecutor(max_workers=max_processes) as executor:
-        # Each parallel process calls the designated function with the designated static inputs and a unique chunk
-        jobs = {executor.submit(
-            function_to_call, chunk, *static_args): chunk for chunk in chunks}
+    with futures.ProcessPoolExecutor(
+        max_workers=max_processes, initializer=initializer, initargs=initargs
+    ) as executor:
+        # Each parallel process calls the designated function with the designated static inputs and a unique chunk.
+        # Only keep a few jobs per process submitted at a time and submit more as jobs finish. This keeps the process
+        # pool busy without holding all the chunks and their pickled arguments in memory at once when there are a
+        # large number of chunks.
+        chunks = iter(chunks)
+        jobs = {}
+
+        def submit_jobs(num_jobs):
+            """Submit the designated number of jobs for the next chunks, if there are any chunks left."""
+            for chunk in itertools.islice(chunks, num_jobs):
+                jobs[executor.submit(function_to_call, chunk, *static_args)] = chunk
+
+        submit_jobs(max_processes * MAX_PENDING_JOBS_PER_PROCESS)
         # As each job is completed, add some logging information and store the results to post-process later
-        for future in futures.as_completed(jobs):
-            try:
-                # Retrieve the results returned by the process
-                result = future.result()
-            except Exception:  # pylint: disable=broad-except
-                # If we couldn't retrieve the result, some terrible error happened and the job errored.
-                # Note: For processes that do network analysis workflows, this does not mean solve failed.
-                # It means some unexpected error was thrown. The most likely
-                # causes are:
-                # a) If you're calling a service, the service was temporarily down.
-                # b) You had a temporary file read/write or resource issue on your machine.
-                # c) If you're actively updating the code, you introduced an error.
-                # To make the tool more robust against temporary glitches, retry submitting the job up to the number
-                # of times designated in MAX_RETRIES.  If the job is still erroring after that many
-                # retries, fail the entire tool run.
-                errs = traceback.format_exc().splitlines()
-                failed_range = jobs[future]
-                logger.debug((
-                    f"Failed to get results for {msg_process_str} chunk {failed_range} from the parallel process. "
-                    f"Will retry up to {MAX_RETRIES} times. Errors: {errs}"
-                ))
-                job_failed = True
-                num_retries = 0
-                while job_failed and num_retries < MAX_RETRIES:
-                    num_retries += 1
-                    try:
-                        future = executor.submit(function_to_call, failed_range, *static_args)
-                        result = future.result()
-                        job_failed = False
-                        logger.debug(f"{msg_process_str} chunk {failed_range} succeeded after {num_retries} retries.")
-                    except Exception:  # pylint: disable=broad-except
-                        # Update exception info to the latest error
-                        errs = traceback.format_exc().splitlines()
-                if job_failed:
-                    # The job errored and did not succeed after retries.  Fail the tool run because something
-                    # terrible is happening.
-                    logger.debug(
-                        f"{msg_process_str} chunk {failed_range} continued to error after {num_retries} retries.")
-                    logger.error(f"Failed to get {msg_process_str} result from parallel processing.")
+        while jobs:
+            done_jobs, _ = futures.wait(jobs, return_when=futures.FIRST_COMPLETED)
+            # Replace the completed jobs with new ones before handling their results so the pool stays busy
+            submit_jobs(len(done_jobs))
+            for future in done_jobs:
+                chunk = jobs.pop(future)
+                try:
+                    # Retrieve the results returned by the process
+                    result = future.result()
+                except Exception:  # pylint: disable=broad-except
+                    # If we couldn't retrieve the result, some terrible error happened and the job errored.
+                    # Note: For processes that do network analysis workflows, this does not mean solve failed.
+                    # It means some unexpected error was thrown. The most likely
+                    # causes are:
+                    # a) If you're calling a service, the service was temporarily down.
+                    # b) You had a temporary file read/write or resource issue on your machine.
+                    # c) If you're actively updating the code, you introduced an error.
+                    # To make the tool more robust against temporary glitches, retry submitting the job up to the
+                    # number of times designated in MAX_RETRIES.  If the job is still erroring after that many
+                    # retries, fail the entire tool run.
                     errs = traceback.format_exc().splitlines()
-                    for err in errs:
-                        logger.error(err)
-                    raise
+                    failed_range = chunk
+                    logger.debug((
+                        f"Failed to get results for {msg_process_str} chunk {failed_range} from the parallel process. "
+                        f"Will retry up to {MAX_RETRIES} times. Errors: {errs}"
+                    ))
+                    job_failed = True
+                    num_retries = 0
+                    while job_failed and num_retries < MAX_RETRIES:
+                        num_retries += 1
+                        try:
+                            future = executor.submit(function_to_call, failed_range, *static_args)
+                            result = future.result()
+                            job_failed = False
+                            logger.debug(
+                                f"{msg_process_str} chunk {failed_range} succeeded after {num_retries} retries.")
+                        except Exception:  # pylint: disable=broad-except
+                            # Update exception info to the latest error
+                            errs = traceback.format_exc().splitlines()
+                    if job_failed:
+                        # The job errored and did not succeed after retries.  Fail the tool run because something
+                        # terrible is happening.
+                        logger.debug(
+                            f"{msg_process_str} chunk {failed_range} continued to error after {num_retries} retries.")
+                        logger.error(f"Failed to get {msg_process_str} result from parallel processing.")
+                        errs = traceback.format_exc().splitlines()
+                        for err in errs:
+                            logger.error(err)
+                        raise
 
-            # If we got this far, the job completed successfully and we retrieved results.
-            completed_jobs += 1
-            logger.info(
-                f"Finished {msg_process_str} {completed_jobs} of {total_jobs}.")
-            job_results.append(result)
+                # If we got this far, the job completed successfully and we retrieved results.
+                completed_jobs += 1
+                logger.info(
+                    f"Finished {msg_process_str} {completed_jobs} of {total_jobs}.")
+                job_results.append(result)
 
         return job_results
 
@@ -864,14 +947,30 @@ class JobFolderMixin:  # pylint:disable = too-few-public-methods
         self.job_folder = os.path.join(self.scratch_folder, self.job_id)
         os.mkdir(self.job_folder)
 
+    def _use_shared_job_folder(self, shared_folder):
+        """Create a job ID and use an existing folder shared by multiple jobs instead of creating a new folder.
+
+        Jobs run one after another in the same worker process can share a folder and scratch gdb, which avoids creating
+        a new folder and geodatabase on disk for every job. Outputs written to the shared folder must be named uniquely
+        using the job ID.
+
+        Args:
+            shared_folder (str): Existing folder to use as the job folder
+        """
+        self.job_id = uuid.uuid4().hex
+        self.job_folder = shared_folder
+
     def _create_output_gdb(self):
-        """Create a scratch geodatabase in the job folder.
+        """Create a scratch geodatabase in the job folder if it does not already exist.
 
         Returns:
             str: Catalog path to output geodatabase
         """
-        self.logger.debug("Creating output geodatabase...")
         out_gdb = os.path.join(self.job_folder, "scratch.gdb")
+        if os.path.exists(out_gdb):
+            # The job folder is shared with earlier jobs, and the scratch gdb was already created.
+            return out_gdb
+        self.logger.debug("Creating output geodatabase...")
         run_gp_tool(
             self.logger,
             arcpy.management.CreateFileGDB,
@@ -880,27 +979,53 @@ class JobFolderMixin:  # pylint:disable = too-few-public-methods
         return out_gdb
 
 
+class BufferedFileHandler(logging.FileHandler):
+    """Log file handler that only flushes the file for warnings and errors, when flushed explicitly, and when closed.
+
+    The standard FileHandler flushes the file after every record, which makes verbose debug logging from the parallel
+    processes cost one write per message.
+    """
+
+    def emit(self, record):
+        """Write the formatted record to the log file buffer."""
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:  # pylint: disable=broad-except
+            self.handleError(record)
+
+
 class LoggingMixin:
     """Used to set up and tear down logging for a parallel process."""
 
-    def setup_logger(self, name_prefix):
+    def setup_logger(self, name_prefix, unique_log_file=False):
         """Set up the logger used for logging messages for this process. Logs are written to a text file.
 
         Args:
-            logger_obj: The logger instance.
+            name_prefix (str): Prefix for the logger and log file names.
+            unique_log_file (bool, optional): Include the job ID in the log file name. Use this when the job folder is
+                shared by multiple jobs. Defaults to False.
         """
-        self.log_file = os.path.join(self.job_folder, name_prefix + ".log")
+        log_file_name = f"{name_prefix}_{self.job_id}.log" if unique_log_file else name_prefix + ".log"
+        self.log_file = os.path.join(self.job_folder, log_file_name)
         self.logger = logging.getLogger(f"{name_prefix}_{self.job_id}")
 
         self.logger.setLevel(logging.DEBUG)
         if len(self.logger.handlers) <= 1:
-            file_handler = logging.FileHandler(self.log_file, encoding="utf-8")
+            file_handler = BufferedFileHandler(self.log_file, encoding="utf-8")
             file_handler.setLevel(logging.DEBUG)
-            self.logger.addHandler(file_handler)
             formatter = logging.Formatter("%(process)d | %(message)s")
             file_handler.setFormatter(formatter)
             self.logger.addHandler(file_handler)
 
+    def flush_logger(self):
+        """Write any buffered log messages to the log file."""
+        for handler in self.logger.handlers:
+            handler.flush()
+
     def teardown_logger(self):
         """Clean up and close the logger."""
         teardown_logger(self.logger)
@@ -1,7 +1,7 @@
 ############################################################################
 ## Tool name: Transit Network Analysis Tools
 ## Created by: Melinda Morang, Esri
-## Last updated: 20 September 2023
+## Last updated: 17 October 2026
 ############################################################################
 """Do the core logic for the Create Percent Access Polygons tool in parallel
 for maximum efficiency.
@@ -40,7 +40,10 @@ LOG_LEVEL = logging.INFO
 class ParallelCounter(AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMixin):
     """Calculate percent access polygons for the designated facility, from break, to break combo."""
 
-    def __init__(self, time_lapse_polygons, raster_template, facility_id, from_break, to_break, scratch_folder):
+    def __init__(  # pylint: disable=too-many-arguments
+        self, time_lapse_polygons, raster_template, facility_id, from_break, to_break, scratch_folder,
+        field_mappings=None
+    ):
         """Initialize the parallel counter for the given inputs.
 
         Args:
@@ -49,7 +52,10 @@ class ParallelCounter(AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMix
             facility_id (int): ID of the Service Area facility to select for processing this chunk
             from_break (float): Service Area FromBreak field value to select for processing this chunk
             to_break (float): Service Area ToBreak field value to select for processing this chunk
-            scratch_folder (folder): Folder location to write intermediate outputs
+            scratch_folder (folder): Folder location to write intermediate outputs. The folder may be shared by other
+                jobs run in the same worker process.
+            field_mappings (arcpy.FieldMappings, optional): Field mappings for Spatial Join from make_field_mappings().
+                Pass these in to reuse them for every job run in the same worker process. Constructed if None.
         """
         self.time_lapse_polygons = time_lapse_polygons
         self.raster_template = raster_template
@@ -57,14 +63,15 @@ class ParallelCounter(AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMix
         self.from_break = from_break
         self.to_break = to_break
         self.scratch_folder = scratch_folder
+        self.field_mappings = field_mappings
 
-        # Create a job ID and a folder for this job
-        self._create_job_folder()
+        # Create a job ID. Jobs share the worker's folder and scratch gdb instead of each creating their own.
+        self._use_shared_job_folder(self.scratch_folder)
         self.scratch_gdb = None  # Set later
 
         # Setup the class logger. Logs for each parallel process are not written to the console but instead to a
-        # process-specific log file.
-        self.setup_logger("PercAccPoly")
+        # job-specific log file.
+        self.setup_logger("PercAccPoly", unique_log_file=True)
 
         # Prepare a dictionary to store info about the analysis results
         self.job_result = {
@@ -81,8 +88,9 @@ class ParallelCounter(AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMix
         self.scratch_gdb = self._create_output_gdb()
         selected_polygons = self._select_polygons()
         joined_polygons = self._join_polygons(selected_polygons)
-        dissolved_polygons = self._dissolve_cells(joined_polygons)
-        self.job_result["polygons"] = dissolved_polygons
+        # Cells are dissolved once on the merged output rather than per combo to avoid paying the Dissolve tool's
+        # fixed overhead for every FacilityID/FromBreak/ToBreak combination.
+        self.job_result["polygons"] = joined_polygons
 
     def _select_polygons(self):
         """Select the subset of polygons for this FacilityID/FromBreak/ToBreak combo and return the layer."""
@@ -108,15 +116,11 @@ class ParallelCounter(AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMix
         # count, and creating the raw output.  The result is a polygon feature class of raster-like cells with a field
         # called Join_Count that shows the number of input time lapse polygons that intersect the cell using the specified
         # match_option.
-        # Create a FieldMappings object for Spatial Join to preserve informational input fields
-        field_mappings = arcpy.FieldMappings()
-        for field in FIELDS_TO_PRESERVE:
-            fmap = arcpy.FieldMap()
-            fmap.addInputField(self.time_lapse_polygons, field)
-            fmap.mergeRule = "First"
-            field_mappings.addFieldMap(fmap)
+        # Create a FieldMappings object for Spatial Join to preserve informational input fields if one wasn't passed in
+        if self.field_mappings is None:
+            self.field_mappings = make_field_mappings(self.time_lapse_polygons)
         # Do the spatial join
-        temp_spatial_join_fc = os.path.join(self.scratch_gdb, "SpatialJoin")
+        temp_spatial_join_fc = os.path.join(self.scratch_gdb, "SpatialJoin_" + self.job_id)
         t0 = time.time()
         arcpy.analysis.SpatialJoin(
             self.raster_template,
@@ -124,41 +128,71 @@ class ParallelCounter(AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMix
             temp_spatial_join_fc,
             "JOIN_ONE_TO_ONE",  # Output keeps only one copy of each "cell" when multiple time lapse polys intersect it
             "KEEP_COMMON",  # Delete any "cells" that don't overlap the time lapse polys being considered
-            field_mapping=field_mappings,  # Preserve some fields from the original data
+            field_mapping=self.field_mappings,  # Preserve some fields from the original data
             match_option="HAVE_THEIR_CENTER_IN"
         )
         self.logger.info(f"Finished spatial join in {time.time() - t0} seconds.")
         return temp_spatial_join_fc
 
-    def _dissolve_cells(self, joined_polygons):
-        """Dissolve percent access cells with the same values and return the path to the output feature class."""
-        # Dissolve all the little cells that were reached the same number of times to make the output more manageable
-        # Currently, the feature class contains a large number of little square polygons representing raster cells. The
-        # Join_Count field added by Spatial Join says how many of the input time lapse polygons overlapped the cell.  We
-        # don't need all the little squares.  We can dissolve them so that we have one polygon per unique value of
-        # Join_Count.
-        dissolved_polygons = os.path.join(self.scratch_gdb, "DissolvedPolys")
-        t0 = time.time()
-        arcpy.management.Dissolve(joined_polygons, dissolved_polygons, FIELDS_TO_PRESERVE + ["Join_Count"])
-        self.logger.info(f"Finished dissolve in {time.time() - t0} seconds.")
-        return dissolved_polygons
 
+def make_field_mappings(time_lapse_polygons):
+    """Make a FieldMappings object for Spatial Join that preserves informational fields from the time lapse polygons.
 
-def parallel_calculate_access(combo, time_lapse_polygons, raster_template, scratch_folder):
-    """Calculate the percent access polygons for this chunk.
+    Args:
+        time_lapse_polygons (feature class catalog path): Time lapse polygons
+
+    Returns:
+        arcpy.FieldMappings: Field mappings for FIELDS_TO_PRESERVE
+    """
+    field_mappings = arcpy.FieldMappings()
+    for field in FIELDS_TO_PRESERVE:
+        fmap = arcpy.FieldMap()
+        fmap.addInputField(time_lapse_polygons, field)
+        fmap.mergeRule = "First"
+        field_mappings.addFieldMap(fmap)
+    return field_mappings
+
+
+def set_up_counter_inputs(time_lapse_polygons, raster_template, scratch_folder):
+    """Do the setup that is the same for every chunk and return the inputs for ParallelCounter shared by the chunks.
 
     Args:
-        combo (list): facility_id, from_break, to_break
         time_lapse_polygons (feature class catalog path): Time lapse polygons
         raster_template (feature class catalog path): Raster-like polygons template
-        scratch_folder (folder): Folder location to write intermediate outputs
+        scratch_folder (folder): Parent folder in which to create a folder for intermediate outputs
+
+    Returns:
+        dict: Keyword inputs for ParallelCounter other than the FacilityID, FromBreak, and ToBreak
+    """
+    # Create one folder for all the chunks that share these inputs. The chunks write to this folder and its scratch gdb.
+    counter_folder = os.path.join(scratch_folder, "Worker_" + uuid.uuid4().hex)
+    os.mkdir(counter_folder)
+    return {
+        "time_lapse_polygons": time_lapse_polygons,
+        "raster_template": raster_template,
+        "scratch_folder": counter_folder,
+        "field_mappings": make_field_mappings(time_lapse_polygons)
+    }
+
+
+def parallel_calculate_access(combo, inputs=None):
+    """Calculate the percent access polygons for this chunk.
+
+    If the worker process was set up with AnalysisHelpers.initialize_worker(), the worker's folder and field mappings
+    are reused for every chunk the worker handles.
+
+    Args:
+        combo (list): facility_id, from_break, to_break
+        inputs (dict, optional): Dictionary of keyword inputs suitable for set_up_counter_inputs(). Only used if the
+            worker process was not set up with AnalysisHelpers.initialize_worker().
 
     Returns:
         dict: job result parameters
     """
+    counter_inputs, _ = AnalysisHelpers.get_worker_object(set_up_counter_inputs, inputs)
     facility_id, from_break, to_break = combo
     cpap_counter = ParallelCounter(
-        time_lapse_polygons, raster_template, facility_id, from_break, to_break, scratch_folder)
+        facility_id=facility_id, from_break=from_break, to_break=to_break, **counter_inputs)
     cpap_counter.make_percent_access_polygons()
     cpap_counter.teardown_logger()
     return cpap_counter.job_result
@@ -184,26 +218,34 @@ def count_percent_access_polygons(logger, time_lapse_polygons, raster_template,
     # Figure out the unique combinations of FacilityID, FromBreak, and ToBreak in the input data. Each of these
     # will be processed separately and get a separate output. Also count the number of unique times of day that
     # were used in the original analysis so we can calculate % later.
-    unique_output_combos = []
-    unique_times = []
+    # Collect the unique values directly into sets as the rows are read rather than building full-length lists of
+    # tuples and de-duplicating them afterwards.
+    unique_output_combos = set()
+    unique_times = set()
     fields = [
         FACILITY_ID_FIELD,
         FROM_BREAK_FIELD,
         TO_BREAK_FIELD,
         TIME_FIELD
     ]
-    for row in arcpy.da.SearchCursor(time_lapse_polygons, fields):  # pylint: disable=no-member
-        unique_output_combos.append((row[0], row[1], row[2]))
-        unique_times.append(row[3])
-    unique_output_combos = sorted(set(unique_output_combos))
+    with arcpy.da.SearchCursor(time_lapse_polygons, fields) as cur:  # pylint: disable=no-member
+        for row in cur:
+            unique_output_combos.add(row[:3])
+            unique_times.add(row[3])
+    unique_output_combos = sorted(unique_output_combos)
     total_jobs = len(unique_output_combos)
-    num_time_steps = len(set(unique_times))
+    num_time_steps = len(unique_times)
 
     # For each set of time lapse polygons, generate the cell-like counts. Do this in parallel for maximum efficiency.
     job_results = AnalysisHelpers.run_parallel_processes(
-        logger, parallel_calculate_access, [time_lapse_polygons, raster_template, scratch_folder], unique_output_combos,
+        logger, parallel_calculate_access, [], unique_output_combos,
         total_jobs, max_processes,
-        "Counting polygons overlapping each cell", "polygon cell calculation"
+        "Counting polygons overlapping each cell", "polygon cell calculation",
+        initializer=AnalysisHelpers.initialize_worker, initargs=({
+            "time_lapse_polygons": time_lapse_polygons,
+            "raster_template": raster_template,
+            "scratch_folder": scratch_folder
+        },)
     )
 
     # Retrieve and store results
@@ -215,14 +257,34 @@ def count_percent_access_polygons(logger, time_lapse_polygons, raster_template,
         else:
             all_polygons.append(result["polygons"])
 
-    # Merge all individual output feature classes into one feature class.
-    logger.info("Parallel processing complete. Merging results to output feature class...")
-    arcpy.management.Merge(all_polygons, output_fc)
+    # Append the cells from all the other individual output feature classes into the first one so there is a single
+    # intermediate feature class to dissolve, without writing a separate merged copy of every cell. The outputs all
+    # have the same schema, so field matching can be skipped.
+    logger.info("Parallel processing complete. Combining results...")
+    merged_polygons = all_polygons[0]
+    if len(all_polygons) > 1:
+        arcpy.management.Append(all_polygons[1:], merged_polygons, "NO_TEST")
+
+    # Dissolve all the little cells that were reached the same number of times to make the output more manageable.
+    # Currently, the feature class contains a large number of little square polygons representing raster cells. The
+    # Join_Count field added by Spatial Join says how many of the input time lapse polygons overlapped the cell.  We
+    # don't need all the little squares.  We can dissolve them so that we have one polygon per unique value of
+    # Join_Count for each FacilityID/FromBreak/ToBreak combination. Doing this once on the merged output is much
+    # cheaper than dissolving each combination separately.
+    logger.info("Dissolving cells with the same values to output feature class...")
+    t0 = time.time()
+    arcpy.management.Dissolve(merged_polygons, output_fc, FIELDS_TO_PRESERVE + ["Join_Count"])
+    logger.info(f"Finished dissolve in {time.time() - t0} seconds.")
     # Calculate a field showing the Percent of times each polygon was reached.
     percent_field = "Percent"
     arcpy.management.AddField(output_fc, percent_field, "DOUBLE")
-    expression = f"float(!Join_Count!) * 100.0 / float({num_time_steps})"
-    arcpy.management.CalculateField(output_fc, percent_field, expression)
+    # Use an UpdateCursor with a precomputed multiplier instead of CalculateField to avoid evaluating a Python
+    # expression string for every row.
+    percent_multiplier = 100.0 / float(num_time_steps)
+    with arcpy.da.UpdateCursor(output_fc, ["Join_Count", percent_field]) as cur:  # pylint: disable=no-member
+        for row in cur:
+            row[1] = row[0] * percent_multiplier
+            cur.updateRow(row)
     logger.info(f"Output feature class successfully created at {output_fc}")
 
     # Cleanup
@@ -38,12 +38,14 @@ Copyright 2024 Esri
 import os
 import uuid
 import logging
+import math
 import shutil
 import itertools
 import time
 import traceback
 import argparse
 from functools import partial
+import numpy as np
 import pandas as pd
 
 import arcpy
@@ -60,7 +62,13 @@ import arcpy
 #     USE_ARROW = True
 #     import pyarrow as pa
 USE_ARROW = False
-import csv
+
+# Read the intermediate OD Lines CSV files with the multithreaded pyarrow CSV parser when pyarrow is available.
+try:
+    import pyarrow  # noqa: F401, pylint: disable=unused-import
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
 # Import OD Cost Matrix settings from config file
 import CalculateAccessibilityMatrix_OD_config
@@ -72,6 +80,25 @@ DELETE_INTERMEDIATE_OD_OUTPUTS = True  # Set to False for debugging purposes
 # Change logging.INFO to logging.DEBUG to see verbose debug messages
 LOG_LEVEL = logging.INFO
 
+# Multiplier used to pack an (OriginOID, DestinationOID) pair into a single int64 key when counting OD pairs
+OD_KEY_MULTIPLIER = 2 ** 32
+
+# Maximum number of cells in the dense origin x destination matrix used to count the times each OD pair was reached
+# for a chunk. Chunks whose ObjectID ranges would need a larger matrix are counted using packed keys instead.
+MAX_DENSE_OD_MATRIX_CELLS = 2 ** 22
+
+# OD config file for each tool
+OD_CONFIGS = {
+    AnalysisHelpers.ODTool.CalculateAccessibilityMatrix: CalculateAccessibilityMatrix_OD_config,
+    AnalysisHelpers.ODTool.CalculateTravelTimeStatistics: CalculateTravelTimeStatistics_OD_config
+}
+# OD config file properties to set on the solver object for each tool. Properties handled explicitly by the tool
+# parameters are filtered out once here instead of every time a solver object is initialized.
+OD_CONFIG_PROPS = {
+    tool: {prop: val for prop, val in config.OD_PROPS.items() if prop not in config.OD_PROPS_SET_BY_TOOL}
+    for tool, config in OD_CONFIGS.items()
+}
+
 
 class ODCostMatrix(
     AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMixin, AnalysisHelpers.MakeNDSLayerMixin
@@ -93,6 +120,9 @@ class ODCostMatrix(
         - scratch_folder
         - od_output_location
         - barriers
+        - barrier_shape_types
+        - origins_oid_field_name
+        - destinations_oid_field_name
         """
         self.tool = kwargs["tool"]
         self.origins = kwargs["origins"]
@@ -110,6 +140,8 @@ class ODCostMatrix(
         self.barriers = []
         if "barriers" in kwargs:
             self.barriers = kwargs["barriers"]
+        # Dictionary of {barrier catalog path: shape type} described once up front by the main process
+        self.barrier_shape_types = kwargs.get("barrier_shape_types") or {}
 
         if self.tool is AnalysisHelpers.ODTool.CalculateAccessibilityMatrix:
             self.output_fields = ["OriginOID", "DestinationOID"]
@@ -128,11 +160,16 @@ class ODCostMatrix(
         # Set up other instance attributes
         self.is_service = AnalysisHelpers.is_nds_service(self.network_data_source)
         self.od_solver = None
+        # The input layers are shared by all chunks solved by this object. Each chunk only updates the selection. The
+        # layer names include the job ID so that other ODCostMatrix objects in the same process, which might use
+        # different inputs, never reuse these layers.
         self.input_origins_layer = "InputOrigins" + self.job_id
         self.input_destinations_layer = "InputDestinations" + self.job_id
+        self.created_input_layers = set()  # Names of the input layers this object has already created
         self.input_origins_layer_obj = None
         self.input_destinations_layer_obj = None
         self.solve_result = None
+        self.loaded_criteria = None  # Origin and destination ranges currently loaded into the solver object
 
         # Create a network dataset layer if needed
         if not self.is_service:
@@ -141,21 +178,29 @@ class ODCostMatrix(
         # Prepare a dictionary to store info about the analysis results
         self.job_result = {
             "jobId": self.job_id,
+            "timeOfDay": None,
             "solveSucceeded": False,
             "solveMessages": "",
             "outputLines": "",
             "logFile": self.log_file
         }
 
-        # Get the ObjectID fields for origins and destinations
-        desc_origins = arcpy.Describe(self.origins)
-        desc_destinations = arcpy.Describe(self.destinations)
-        self.origins_oid_field_name = desc_origins.oidFieldName
-        self.destinations_oid_field_name = desc_destinations.oidFieldName
+        # Get the ObjectID fields for origins and destinations. The main process describes the inputs once and passes
+        # the field names along so each parallel process doesn't have to re-read the feature class properties.
+        self.origins_oid_field_name = kwargs.get("origins_oid_field_name") or \
+            arcpy.Describe(self.origins).oidFieldName
+        self.destinations_oid_field_name = kwargs.get("destinations_oid_field_name") or \
+            arcpy.Describe(self.destinations).oidFieldName
+        # Where clause templates used to select the ObjectID range for each chunk. Build these once since they are
+        # filled in for every chunk.
+        self.origins_where_template = (
+            f"{self.origins_oid_field_name} >= %d AND {self.origins_oid_field_name} <= %d")
+        self.destinations_where_template = (
+            f"{self.destinations_oid_field_name} >= %d AND {self.destinations_oid_field_name} <= %d")
         self.orig_origin_oid_field = "Orig_Origin_OID"
         self.orig_dest_oid_field = "Orig_Dest_OID"
 
-    def initialize_od_solver(self, time_of_day=None):
+    def initialize_od_solver(self):
         """Initialize an OD solver object and set properties."""
         # For a local network dataset, we need to checkout the Network Analyst extension license.
         if not self.is_service:
@@ -171,20 +216,9 @@ class ODCostMatrix(
         # The properties have been extracted to the config file to make them easier to find and set so users don't have
         # to dig through the code to change them.
         self.logger.debug("Setting OD Cost Matrix analysis properties from OD config file...")
-        if self.tool is AnalysisHelpers.ODTool.CalculateAccessibilityMatrix:
-            od_props = CalculateAccessibilityMatrix_OD_config.OD_PROPS
-            od_props_set_by_tool = CalculateAccessibilityMatrix_OD_config.OD_PROPS_SET_BY_TOOL
-        elif self.tool is AnalysisHelpers.ODTool.CalculateTravelTimeStatistics:
-            od_props = CalculateTravelTimeStatistics_OD_config.OD_PROPS
-            od_props_set_by_tool = CalculateTravelTimeStatistics_OD_config.OD_PROPS_SET_BY_TOOL
-        else:
+        if self.tool not in OD_CONFIG_PROPS:
             raise ValueError("Invalid OD Cost Matrix tool.")
-        for prop, val in od_props.items():
-            if prop in od_props_set_by_tool:
-                self.logger.warning(
-                    f"OD config file property {prop} is handled explicitly by the tool parameters and will be ignored."
-                )
-                continue
+        for prop, val in OD_CONFIG_PROPS[self.tool].items():
             try:
                 setattr(self.od_solver, prop, val)
             except Exception as ex:  # pylint: disable=broad-except
@@ -202,11 +236,6 @@ class ODCostMatrix(
         if self.tool is AnalysisHelpers.ODTool.CalculateAccessibilityMatrix:
             self.od_solver.timeUnits = self.time_units
             self.od_solver.defaultImpedanceCutoff = self.cutoff
-        # Set time of day, which is passed in as an OD solve parameter from our chunking mechanism
-        self.od_solver.timeOfDay = time_of_day
-
-        # Ensure the travel mode has impedance units that are time-based.
-        self._validate_travel_mode()
 
     def _validate_travel_mode(self):
         """Validate that the travel mode has time units.
@@ -227,16 +256,111 @@ class ODCostMatrix(
     def solve(self, origins_criteria, destinations_criteria, time_of_day):
         """Create and solve an OD Cost Matrix analysis for the designated chunk of origins and destinations.
 
+        If the solver object already has the inputs for this chunk of origins and destinations loaded from a previous
+        solve, they are reused, and only the time of day is updated.
+
         Args:
             origins_criteria (list): Origin ObjectID range to select from the input dataset
             destinations_criteria ([type]): Destination ObjectID range to select from the input dataset
             time_of_day (datetime): Time of day for this solve
         """
+        # Reset the result dictionary in case this object was used for an earlier solve
+        self.job_result["timeOfDay"] = time_of_day
+        self.job_result["solveSucceeded"] = False
+        self.job_result["solveMessages"] = ""
+        self.job_result["outputLines"] = ""
+
+        # Create the solver object and load the inputs if they are not already loaded for this chunk
+        if self.loaded_criteria != (origins_criteria, destinations_criteria):
+            self._load_inputs(origins_criteria, destinations_criteria)
+
+        # Set time of day, which is passed in as an OD solve parameter from our chunking mechanism
+        self.od_solver.timeOfDay = time_of_day
+
+        # Solve the OD cost matrix analysis
+        self.logger.debug("Solving OD cost matrix...")
+        solve_start = time.time()
+        self.solve_result = self.od_solver.solve()
+        solve_end = time.time()
+        self.logger.debug(f"Solving OD cost matrix completed in {round(solve_end - solve_start, 3)} (seconds).")
+
+        # Handle solve messages. Dense analyses can generate tens of thousands of messages, and they are only reported
+        # by the main process when the solve fails, so don't bother reading them for successful solves unless we're
+        # debugging.
+        if not self.solve_result.solveSucceeded or LOG_LEVEL <= logging.DEBUG:
+            self.job_result["solveMessages"] = self._get_solve_messages()
+
+        # Update the result dictionary
+        if not self.solve_result.solveSucceeded:
+            self.logger.debug("Solve failed.")
+            return
+        self.logger.debug("Solve succeeded.")
+        self.job_result["solveSucceeded"] = True
+
+        # Read the results to discover all destinations reached by the origins in this chunk and store the output
+        # in a file with a specific naming scheme.
+        # Example: ODLines_O_1_1000_D_2001_3000_T_20220428_091500.csv
+        time_string = time_of_day.strftime("%Y%m%d_%H%M%S")
+        out_filename = (
+            f"ODLines_O_{origins_criteria[0]}_{origins_criteria[1]}_"
+            f"D_{destinations_criteria[0]}_{destinations_criteria[1]}_"
+            f"T_{time_string}"
+        )
+        self.logger.debug("Logging OD Cost Matrix results...")
+        if USE_ARROW:
+            output_od_lines = os.path.join(self.od_output_location, f"{out_filename}.at")
+            self._export_to_arrow(output_od_lines)
+        else:
+            output_od_lines = os.path.join(self.od_output_location, f"{out_filename}.csv")
+            self._export_to_csv(output_od_lines)
+
+        self.logger.debug("Finished calculating OD cost matrix.")
+
+    def _get_solve_messages(self):
+        """Log the solve messages and return them as a single string with repetitive messages consolidated."""
+        solve_msgs = [msg[-1] for msg in self.solve_result.solverMessages(arcpy.nax.MessageSeverity.All)]
+        initial_num_msgs = len(solve_msgs)
+        # Log all the messages as one record instead of one record per message
+        if solve_msgs:
+            self.logger.debug("\n".join(solve_msgs))
+        # Remove repetitive messages so they don't clog up the stdout pipeline when running the tool
+        # 'No "Destinations" found for "Location 1" in "Origins".' is a common message that tends to be repeated and is
+        # not particularly useful to see in bulk.
+        # Note that this will not work for localized software when this message is translated.
+        common_msg_prefix = 'No "Destinations" found for '
+        solve_msgs = [msg for msg in solve_msgs if not msg.startswith(common_msg_prefix)]
+        num_msgs_removed = initial_num_msgs - len(solve_msgs)
+        if num_msgs_removed:
+            self.logger.debug(f"Repetitive messages starting with {common_msg_prefix} were consolidated.")
+            solve_msgs.append(f"No destinations were found for {num_msgs_removed} origins.")
+        return "\n".join(solve_msgs)
+
+    def _load_inputs(self, origins_criteria, destinations_criteria):
+        """Load the inputs for the designated chunk of origins and destinations into the OD solver object.
+
+        The OD solver object is created and configured the first time inputs are loaded and then reused for all later
+        chunks solved by this process. Loading a new chunk replaces the origins and destinations already loaded.
+
+        Args:
+            origins_criteria (list): Origin ObjectID range to select from the input dataset
+            destinations_criteria ([type]): Destination ObjectID range to select from the input dataset
+        """
+        # Clear the loaded criteria until the new inputs are fully loaded so a failed load is never reused
+        self.loaded_criteria = None
+
         # Select the origins and destinations to process
         self._select_inputs(origins_criteria, destinations_criteria)
 
-        # Initialize the OD solver object
-        self.initialize_od_solver(time_of_day)
+        # Initialize the OD solver object and load the barriers, which are the same for every chunk, if this is the
+        # first chunk solved by this process
+        if self.od_solver is None:
+            try:
+                self.initialize_od_solver()
+                self._load_barriers()
+            except Exception:
+                # Don't reuse a partially set up solver object for later chunks
+                self.od_solver = None
+                raise
 
         # Load the origins
         self.logger.debug("Loading origins...")
@@ -264,7 +388,10 @@ class ODCostMatrix(
             False
         )
 
-        # Load barriers
+        self.loaded_criteria = (origins_criteria, destinations_criteria)
+
+    def _load_barriers(self):
+        """Load the barriers into the OD solver object."""
         # Note: This loads ALL barrier features for every analysis, even if they are very far away from any of
         # the inputs in the current chunk. You may want to select only barriers within a reasonable distance of the
         # inputs, particularly if you run into the maximumFeaturesAffectedByLineBarriers,
@@ -273,7 +400,9 @@ class ODCostMatrix(
         # if it becomes a problem.
         for barrier_fc in self.barriers:
             self.logger.debug(f"Loading barriers feature class {barrier_fc}...")
-            shape_type = arcpy.Describe(barrier_fc).shapeType
+            shape_type = self.barrier_shape_types.get(barrier_fc)
+            if shape_type is None:
+                shape_type = arcpy.Describe(barrier_fc).shapeType
             if shape_type == "Polygon":
                 class_type = arcpy.nax.OriginDestinationCostMatrixInputDataType.PolygonBarriers
             elif shape_type == "Polyline":
@@ -288,57 +417,6 @@ class ODCostMatrix(
             barriers_field_mappings = self.od_solver.fieldMappings(class_type, True)
             self.od_solver.load(class_type, barrier_fc, barriers_field_mappings, True)
 
-        # Solve the OD cost matrix analysis
-        self.logger.debug("Solving OD cost matrix...")
-        solve_start = time.time()
-        self.solve_result = self.od_solver.solve()
-        solve_end = time.time()
-        self.logger.debug(f"Solving OD cost matrix completed in {round(solve_end - solve_start, 3)} (seconds).")
-
-        # Handle solve messages
-        solve_msgs = [msg[-1] for msg in self.solve_result.solverMessages(arcpy.nax.MessageSeverity.All)]
-        initial_num_msgs = len(solve_msgs)
-        for msg in solve_msgs:
-            self.logger.debug(msg)
-        # Remove repetitive messages so they don't clog up the stdout pipeline when running the tool
-        # 'No "Destinations" found for "Location 1" in "Origins".' is a common message that tends to be repeated and is
-        # not particularly useful to see in bulk.
-        # Note that this will not work for localized software when this message is translated.
-        common_msg_prefix = 'No "Destinations" found for '
-        solve_msgs = [msg for msg in solve_msgs if not msg.startswith(common_msg_prefix)]
-        num_msgs_removed = initial_num_msgs - len(solve_msgs)
-        if num_msgs_removed:
-            self.logger.debug(f"Repetitive messages starting with {common_msg_prefix} were consolidated.")
-            solve_msgs.append(f"No destinations were found for {num_msgs_removed} origins.")
-        solve_msgs = "\n".join(solve_msgs)
-
-        # Update the result dictionary
-        self.job_result["solveMessages"] = solve_msgs
-        if not self.solve_result.solveSucceeded:
-            self.logger.debug("Solve failed.")
-            return
-        self.logger.debug("Solve succeeded.")
-        self.job_result["solveSucceeded"] = True
-
-        # Read the results to discover all destinations reached by the origins in this chunk and store the output
-        # in a file with a specific naming scheme.
-        # Example: ODLines_O_1_1000_D_2001_3000_T_20220428_091500.csv
-        time_string = time_of_day.strftime("%Y%m%d_%H%M%S")
-        out_filename = (
-            f"ODLines_O_{origins_criteria[0]}_{origins_criteria[1]}_"
-            f"D_{destinations_criteria[0]}_{destinations_criteria[1]}_"
-            f"T_{time_string}"
-        )
-        self.logger.debug("Logging OD Cost Matrix results...")
-        if USE_ARROW:
-            output_od_lines = os.path.join(self.od_output_location, f"{out_filename}.at")
-            self._export_to_arrow(output_od_lines)
-        else:
-            output_od_lines = os.path.join(self.od_output_location, f"{out_filename}.csv")
-            self._export_to_csv(output_od_lines)
-
-        self.logger.debug("Finished calculating OD cost matrix.")
-
     def _export_to_csv(self, out_csv_file):
         """Save the OD Lines result to a CSV file."""
         self.logger.debug(f"Saving OD cost matrix Lines output to CSV as {out_csv_file}.")
@@ -381,14 +459,14 @@ class ODCostMatrix(
             od_df.to_csv(out_csv_file, index=False)
 
         else:  # Local network dataset output
-            with open(out_csv_file, "w", newline='', encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(self.output_fields)
-                for row in self.solve_result.searchCursor(
-                    arcpy.nax.OriginDestinationCostMatrixOutputDataType.Lines,
-                    self.output_fields
-                ):
-                    writer.writerow(row)
+            # Export the Lines to a temporary in-memory table and read the needed fields in bulk into a NumPy array
+            # instead of iterating through the solve result's search cursor and writing the CSV one row at a time.
+            lines_table = os.path.join("memory", "ODLines_" + self.job_id)
+            self.solve_result.export(arcpy.nax.OriginDestinationCostMatrixOutputDataType.Lines, lines_table)
+            od_array = arcpy.da.TableToNumPyArray(lines_table, self.output_fields)  # pylint: disable=no-member
+            arcpy.management.Delete(lines_table)
+            pd.DataFrame(od_array).to_csv(out_csv_file, index=False)
+            del od_array
 
         self.job_result["outputLines"] = out_csv_file
 
@@ -403,7 +481,7 @@ class ODCostMatrix(
         self.job_result["outputLines"] = out_arrow_file
 
     def _select_inputs(self, origins_criteria, destinations_criteria):
-        """Create layers from the origins and destinations so the layers contain only the desired inputs for the chunk.
+        """Select the origins and destinations in the input layers so the layers contain only the inputs for the chunk.
 
         Args:
             origins_criteria (list): Origin ObjectID range to select from the input dataset
@@ -411,52 +489,82 @@ class ODCostMatrix(
         """
         # Select the origins with ObjectIDs in this range
         self.logger.debug("Selecting origins for this chunk...")
-        origins_where_clause = (
-            f"{self.origins_oid_field_name} >= {origins_criteria[0]} "
-            f"AND {self.origins_oid_field_name} <= {origins_criteria[1]}"
-        )
-        self.input_origins_layer_obj = AnalysisHelpers.run_gp_tool(
-            self.logger,
-            arcpy.management.MakeFeatureLayer,
-            [self.origins, self.input_origins_layer, origins_where_clause]
-        ).getOutput(0)
+        origins_where_clause = self.origins_where_template % (origins_criteria[0], origins_criteria[1])
+        self.input_origins_layer_obj = self._select_from_input_layer(
+            self.origins, self.input_origins_layer, origins_where_clause)
 
-        # Select the destinations with ObjectIDs in this range subject to the global destination where clause
+        # Select the destinations with ObjectIDs in this range subject to the global destination where clause, which is
+        # applied to the layer as a definition query
         self.logger.debug("Selecting destinations for this chunk...")
-        destinations_where_clause = (
-            f"{self.destinations_oid_field_name} >= {destinations_criteria[0]} "
-            f"AND {self.destinations_oid_field_name} <= {destinations_criteria[1]}"
+        destinations_where_clause = self.destinations_where_template % (
+            destinations_criteria[0], destinations_criteria[1])
+        self.input_destinations_layer_obj = self._select_from_input_layer(
+            self.destinations, self.input_destinations_layer, destinations_where_clause,
+            self.destination_where_clause
         )
-        if self.destination_where_clause:
-            destinations_where_clause += f" AND {self.destination_where_clause}"
-        self.input_destinations_layer_obj = AnalysisHelpers.run_gp_tool(
+
+    def _select_from_input_layer(self, input_fc, layer_name, where_clause, definition_query=""):
+        """Select features in an input layer, creating the layer only if this object has not already created it.
+
+        Args:
+            input_fc (str): Catalog path to the input feature class
+            layer_name (str): Name of the feature layer
+            where_clause (str): Where clause used to select the features for this chunk
+            definition_query (str, optional): Where clause applied to the layer for all chunks. Defaults to "".
+
+        Returns:
+            layer: Feature layer with the chunk's features selected
+        """
+        if layer_name not in self.created_input_layers:
+            # Create the layer once per object. Later chunks reuse it without having to spend time re-opening the
+            # feature class and making a fresh layer.
+            AnalysisHelpers.run_gp_tool(
+                self.logger,
+                arcpy.management.MakeFeatureLayer,
+                [input_fc, layer_name, definition_query]
+            )
+            self.created_input_layers.add(layer_name)
+        return AnalysisHelpers.run_gp_tool(
             self.logger,
-            arcpy.management.MakeFeatureLayer,
-            [self.destinations, self.input_destinations_layer, destinations_where_clause]
+            arcpy.management.SelectLayerByAttribute,
+            [layer_name, "NEW_SELECTION", where_clause]
         ).getOutput(0)
 
 
-def solve_od_cost_matrix(chunk, inputs):
-    """Solve an OD Cost Matrix analysis for the given inputs for the given chunk of ObjectIDs.
+def solve_od_cost_matrix(chunk, inputs=None):
+    """Solve an OD Cost Matrix analysis for the given inputs for the given chunk of ObjectIDs and times of day.
+
+    The origins and destinations for the chunk are loaded into the solver once and reused for each time of day. If the
+    worker process was set up with AnalysisHelpers.initialize_worker(), the worker's ODCostMatrix object, including its
+    job folder, logger, and network dataset layer, is reused for every chunk the worker solves.
 
     Args:
         chunk (list): Represents the ObjectID ranges to select from the origins and destinations when solving the OD
-            Cost Matrix and the analysis start time of day. For example,
-            [[1, 1000], [4001, 5000], datetime.datetime(2021, 6, 6, 8, 0, 0)] means use origin OIDs 1-1000 and
-            destination OIDs 4001-5000 and a start time of 8:00 AM on June 6, 2021.
-        inputs (dict): Dictionary of keyword inputs suitable for initializing the ODCostMatrix class
+            Cost Matrix and the list of analysis start times of day. For example,
+            [[1, 1000], [4001, 5000], [datetime.datetime(2021, 6, 6, 8, 0, 0), datetime.datetime(2021, 6, 6, 8, 1, 0)]]
+            means use origin OIDs 1-1000 and destination OIDs 4001-5000 and start times of 8:00 AM and 8:01 AM on June
+            6, 2021.
+        inputs (dict, optional): Dictionary of keyword inputs suitable for initializing the ODCostMatrix class. Only
+            used if the worker process was not set up with AnalysisHelpers.initialize_worker().
 
     Returns:
-        dict: Dictionary of results from the ODCostMatrix class
+        list(dict): Dictionary of results from the ODCostMatrix class for each time of day
     """
-    odcm = ODCostMatrix(**inputs)
+    odcm, is_worker_odcm = AnalysisHelpers.get_worker_object(ODCostMatrix, inputs)
     odcm.logger.info((
         f"Processing origins OID {chunk[0][0]} to {chunk[0][1]} and destinations OID {chunk[1][0]} to {chunk[1][1]} "
-        f"for start time {chunk[2]} as job id {odcm.job_id}"
+        f"for start times {chunk[2][0]} to {chunk[2][-1]} as job id {odcm.job_id}"
     ))
-    odcm.solve(chunk[0], chunk[1], chunk[2])
-    odcm.teardown_logger()
-    return odcm.job_result
+    job_results = []
+    for time_of_day in chunk[2]:
+        odcm.solve(chunk[0], chunk[1], time_of_day)
+        job_results.append(dict(odcm.job_result))
+    if is_worker_odcm:
+        # The worker's log file stays open for later chunks, so write out the messages logged for this chunk
+        odcm.flush_logger()
+    else:
+        odcm.teardown_logger()
+    return job_results
 
 
 class ParallelODCalculator():
@@ -562,17 +670,30 @@ class ParallelODCalculator():
             "od_output_location": self.od_output_location,
             "time_units": time_units,
             "cutoff": cutoff,
-            "barriers": barriers
+            "barriers": barriers,
+            # Describe the barriers once here instead of in every chunk
+            "barrier_shape_types": {barrier_fc: arcpy.Describe(barrier_fc).shapeType for barrier_fc in barriers},
+            # Describe the origins and destinations once here instead of in every chunk
+            "origins_oid_field_name": arcpy.Describe(self.origins).oidFieldName,
+            "destinations_oid_field_name": arcpy.Describe(self.destinations).oidFieldName
         }
 
         # Construct OID ranges for chunks of origins and destinations
-        self.origin_ranges = self._get_oid_ranges_for_input(self.origins, max_origins)
-        destination_ranges = self._get_oid_ranges_for_input(self.destinations, max_destinations, self.dest_where)
-
-        # Construct chunks consisting of (range of origin oids, range of destination oids, start time)
-        self.chunks = itertools.product(self.origin_ranges, destination_ranges, self.start_times)
+        self.origin_ranges = AnalysisHelpers.get_oid_ranges_for_input(self.origins, max_origins)
+        destination_ranges = AnalysisHelpers.get_oid_ranges_for_input(
+            self.destinations, max_destinations, self.dest_where)
+
+        # Construct chunks consisting of (range of origin oids, range of destination oids, list of start times). The
+        # start times in a chunk are solved one after another by the same process, which loads the origins and
+        # destinations once and reuses them for each time of day. Split the start times into groups so there are about
+        # TIME_GROUPS_PER_PROCESS jobs per parallel process in total to keep all the processes evenly busy.
+        num_od_chunks = len(self.origin_ranges) * len(destination_ranges)
+        num_time_groups = math.ceil(
+            self.max_processes * AnalysisHelpers.TIME_GROUPS_PER_PROCESS / num_od_chunks) if num_od_chunks else 1
+        start_time_groups = AnalysisHelpers.split_list_into_groups(self.start_times, num_time_groups)
+        self.chunks = itertools.product(self.origin_ranges, destination_ranges, start_time_groups)
         # Calculate the total number of jobs to use in logging
-        self.total_jobs = len(self.origin_ranges) * len(destination_ranges) * len(self.start_times)
+        self.total_jobs = num_od_chunks * len(start_time_groups)
 
         self.od_line_files = []
 
@@ -581,10 +702,21 @@ class ParallelODCalculator():
         # Create a dummy ODCostMatrix object, initialize an OD solver object, and set properties. This allows us to
         # detect any errors prior to spinning up a bunch of parallel processes and having them all fail.
         self.logger.debug("Validating OD Cost Matrix settings...")
+        if self.tool not in OD_CONFIGS:
+            raise ValueError("Invalid OD Cost Matrix tool.")
+        od_config = OD_CONFIGS[self.tool]
+        for prop in od_config.OD_PROPS:
+            if prop in od_config.OD_PROPS_SET_BY_TOOL:
+                self.logger.warning(
+                    f"OD config file property {prop} is handled explicitly by the tool parameters and will be ignored."
+                )
         odcm = None
         try:
             odcm = ODCostMatrix(**self.od_inputs)
             odcm.initialize_od_solver()
+            # Ensure the travel mode has impedance units that are time-based. The travel mode is the same for every
+            # chunk, so this only needs to be checked once here and not again in each parallel process.
+            odcm._validate_travel_mode()  # pylint: disable=protected-access
             self.logger.debug("OD Cost Matrix settings successfully validated.")
         except Exception:
             self.logger.error("Error initializing OD Cost Matrix analysis.")
@@ -594,48 +726,9 @@ class ParallelODCalculator():
             raise
         finally:
             if odcm:
-                # Close logging and delete the temporary log file
+                # Close logging and delete the temporary job folder and log file
                 odcm.teardown_logger()
-                os.remove(odcm.log_file)
-
-    @staticmethod
-    def _get_oid_ranges_for_input(input_fc, max_chunk_size, where=""):
-        """Construct ranges of ObjectIDs for use in where clauses to split large data into chunks.
-
-        Args:
-            input_fc (str, layer): Data that needs to be split into chunks
-            max_chunk_size (int): Maximum number of rows that can be in a chunk
-            where (str, optional): Where clause to use to filter data before chunking. Defaults to "".
-
-        Returns:
-            list: list of ObjectID ranges for the current dataset representing each chunk. For example,
-                [[1, 1000], [1001, 2000], [2001, 2478]] represents three chunks of no more than 1000 rows.
-        """
-        ranges = []
-        num_in_range = 0
-        current_range = [0, 0]
-        # Loop through all OIDs of the input and construct tuples of min and max OID for each chunk
-        # We do it this way and not by straight-up looking at the numerical values of OIDs to account
-        # for definition queries, selection sets, or feature layers with gaps in OIDs
-        for row in arcpy.da.SearchCursor(input_fc, "OID@", where):  # pylint: disable=no-member
-            oid = row[0]
-            if num_in_range == 0:
-                # Starting new range
-                current_range[0] = oid
-            # Increase the count of items in this range and set the top end of the range to the current oid
-            num_in_range += 1
-            current_range[1] = oid
-            if num_in_range == max_chunk_size:
-                # Finishing up a chunk
-                ranges.append(current_range)
-                # Reset range trackers
-                num_in_range = 0
-                current_range = [0, 0]
-        # After looping, close out the last range if we still have one open
-        if current_range != [0, 0]:
-            ranges.append(current_range)
-
-        return ranges
+                shutil.rmtree(odcm.job_folder, ignore_errors=True)
 
     def solve_od_in_parallel(self):
         """Solve the OD Cost Matrix in chunks and post-process the results."""
@@ -646,13 +739,15 @@ class ParallelODCalculator():
 
         # Compute OD cost matrix in parallel
         job_results = AnalysisHelpers.run_parallel_processes(
-            self.logger, solve_od_cost_matrix, [self.od_inputs], self.chunks,
+            self.logger, solve_od_cost_matrix, [], self.chunks,
             self.total_jobs, self.max_processes,
-            "Solving OD Cost Matrix", "OD Cost Matrix"
+            "Solving OD Cost Matrix", "OD Cost Matrix",
+            initializer=AnalysisHelpers.initialize_worker, initargs=(self.od_inputs,)
         )
 
-        # Parse the results and store components for post-processing.
-        for result in job_results:
+        # Parse the results and store components for post-processing. Each job returns a list of results, one for each
+        # time of day.
+        for result in itertools.chain.from_iterable(job_results):
             if result["solveSucceeded"]:
                 self.od_line_files.append(result["outputLines"])
             else:
@@ -661,7 +756,8 @@ class ParallelODCalculator():
                 # likely, reasons for solve failure. Write solve messages to the main GP message thread in debug
                 # mode only in case the user is having problems. The user can also check the individual OD log
                 # files.
-                self.logger.debug(f"Solve failed for job id {result['jobId']}.")
+                # The job ID is shared by all the chunks in a worker process, so identify the failed time of day too
+                self.logger.debug(f"Solve failed for job id {result['jobId']} and start time {result['timeOfDay']}.")
                 self.logger.debug(result["solveMessages"])
 
         # Post-process and write out results according to which tool is being run
@@ -701,111 +797,187 @@ class ParallelODCalculator():
         else:
             self.logger.debug("Reading results into dataframe from CSV files...")
         t0 = time.time()
-        result_df = None
-        for od_file in self.od_line_files:
-            if USE_ARROW:
-                with pa.memory_map(od_file, 'r') as source:
-                    batch_reader = pa.ipc.RecordBatchFileReader(source)
-                    chunk_table = batch_reader.read_all()
-                df = chunk_table.to_pandas(split_blocks=True, zero_copy_only=True)
-            else:
-                df = pd.read_csv(od_file, dtype={"OriginOID": int, "DestinationOID": int})
-
-            df["TimesReached"] = 1
-            df.set_index(["OriginOID", "DestinationOID"], inplace=True)
-
-            if result_df is None:
-                # Initialize the big combined dataframe if this is the first one
-                result_df = df
-                continue
-
-            # Add the current results dataframe to the big combined one and sum the number of times reached so
-            # far for each OD pair
-            result_df = pd.concat([result_df, df]).groupby(["OriginOID", "DestinationOID"]).sum()
+        # Each OD Lines file holds the results for one origin range, one destination range, and one time of day. The
+        # origin and destination ranges partition the inputs, so a given OD pair can only appear in the files belonging
+        # to a single origin/destination range combination. Count the times each pair was reached within each
+        # combination independently and then stack the results once at the end instead of repeatedly re-aggregating
+        # an ever-growing combined dataframe.
+        # An OD pair can be reached at most once per start time, so store TimesReached using the smallest integer type
+        # that fits the number of start times (typically one byte) instead of int64.
+        times_reached_dtype = np.min_scalar_type(len(self.start_times))
+        chunk_counts = []
+        for chunk_files in self._group_od_line_files_by_od_ranges(self.od_line_files).values():
+            df = pd.concat([self._read_od_lines_file(od_file) for od_file in chunk_files], ignore_index=True)
+            chunk_counts.append(self._count_times_reached(df).astype(times_reached_dtype))
             del df
-
-        result_df.reset_index(inplace=True)
+        result_df = pd.concat(chunk_counts).reset_index()
+        del chunk_counts
 
         self.logger.debug(f"Time to read all OD result files: {time.time() - t0}")
 
+        # Create the output dataframe indexed by the OriginOID. Factorize the origins once and sum the weights of the
+        # destinations reached by each origin with bincount instead of grouping the dataframe for every statistic.
+        self.logger.debug("Creating output dataframe indexed by OriginOID...")
+        origin_codes, unique_origins = pd.factorize(result_df["OriginOID"])
+        times_reached = result_df["TimesReached"].to_numpy()
+
         # Handle accounting for the actual number of destinations
         if self.weight_field:
-            # Read in the weight field values and join them into the result table
-            self.logger.debug("Joining weight field from destinations to results dataframe...")
-            with arcpy.da.SearchCursor(  # pylint: disable=no-member
-                    self.destinations, ["OID@", self.weight_field]) as cur:
-                w_df = pd.DataFrame(cur, columns=["DestinationOID", "Weight"])
+            # Read in the weight field values and look up the weight of each destination in the result table
+            self.logger.debug("Looking up destination weights for the results...")
+            dest_weights = arcpy.da.FeatureClassToNumPyArray(  # pylint: disable=no-member
+                self.destinations, ["OID@", self.weight_field], skip_nulls=True)
+            dest_oids = dest_weights["OID@"]
+            dest_weights = dest_weights[self.weight_field]
 
             # Calculate the total number of destinations based on weight and store this for later use
-            total_dests = w_df["Weight"].sum()
-
-            # Join the Weight field into the results dataframe
-            w_df.set_index("DestinationOID", inplace=True)
-            result_df = result_df.join(w_df, "DestinationOID")
-            del w_df
+            total_dests = dest_weights.sum(dtype="float64")
 
-            # We don't need this field anymore
-            result_df.drop(["DestinationOID"], axis="columns", inplace=True)
+            # Destinations with null weights were excluded from the OD solves, so every reached destination has a
+            # weight
+            dest_order = np.argsort(dest_oids)
+            weights = dest_weights[dest_order[np.searchsorted(
+                dest_oids, result_df["DestinationOID"].to_numpy(), sorter=dest_order)]]
+            del dest_oids, dest_weights, dest_order
 
         else:
             # Count every row as 1 since we're not using a weight field
-            result_df["Weight"] = 1
+            weights = np.ones(len(times_reached), dtype="int64")
 
             # Set the total number of destinations to the number of rows in the destinations table.
             total_dests = int(arcpy.management.GetCount(self.destinations).getOutput(0))
-
-        # Create the output dataframe indexed by the OriginOID
-        self.logger.debug("Creating output dataframe indexed by OriginOID...")
-        unique = result_df["OriginOID"].unique()
-        output_df = pd.DataFrame(unique, columns=["OriginOID"])
-        del unique
-        output_df.set_index("OriginOID", inplace=True)
-
-        # Calculate the total destinations found for each origin using the weight field
-        self.logger.debug("Calculating TotalDests and PercDests...")
-        output_df["TotalDests"] = result_df[result_df["TimesReached"] > 0].groupby("OriginOID")["Weight"].sum()
-        # Calculate the percentage of destinations reached
-        output_df["PercDests"] = 100.0 * output_df["TotalDests"] / total_dests
+        del result_df
 
         # Determine the TotalDests field type because this affects the output field type to use
-        if pd.api.types.is_integer_dtype(output_df["TotalDests"]):
+        if np.issubdtype(weights.dtype, np.integer):
             num_dest_field_type = "LONG"
+            num_dest_dtype = "int64"
         else:
             num_dest_field_type = "DOUBLE"
-
-        # Calculate the number of destinations accessible at different thresholds
+            num_dest_dtype = "float64"
+        # TotalDests counts the destinations reached at least once, and each DsAL{perc}Perc statistic counts the
+        # destinations reached at least perc% of start times. Get the minimum times reached for each statistic and bin
+        # each OD pair by the number of these minimums it meets. A single bincount then builds a weighted histogram of
+        # the bins for each origin, and summing each histogram from the top gives every statistic at once.
         self.logger.debug("Calculating the number of destinations accessible at different thresholds...")
-        field_defs = [["TotalDests", num_dest_field_type], ["PercDests", "DOUBLE"]]
-        for perc in range(10, 100, 10):
-            total_field = f"DsAL{perc}Perc"
-            perc_field = f"PsAL{perc}Perc"
-            field_defs += [[total_field, num_dest_field_type], [perc_field, "DOUBLE"]]
-            threshold = len(self.start_times) * perc / 100
-            output_df[total_field] = result_df[result_df["TimesReached"] >= threshold].groupby(
-                "OriginOID")["Weight"].sum()
-            output_df[perc_field] = 100.0 * output_df[total_field] / total_dests
-        # Fill empty cells with 0
-        output_df.fillna(0, inplace=True)
-        # Clean up
-        del result_df
+        percs = range(10, 100, 10)
+        min_times_reached = [1] + [math.ceil(len(self.start_times) * perc / 100) for perc in percs]
+        num_bins = len(min_times_reached) + 1
+        bins = np.searchsorted(min_times_reached, times_reached, side="right")
+        histograms = np.bincount(
+            origin_codes * num_bins + bins, weights=weights, minlength=len(unique_origins) * num_bins
+        ).reshape(-1, num_bins)
+        totals = histograms[:, ::-1].cumsum(axis=1)[:, ::-1][:, 1:].astype(num_dest_dtype)
+        del origin_codes, times_reached, weights, bins, histograms
+
+        # Find the row of each origin in the results in the full list of origins. Origins that weren't in the results at
+        # all have 0 for every statistic.
+        oid_field = arcpy.Describe(self.origins).oidFieldName
+        origin_oids = arcpy.da.FeatureClassToNumPyArray(self.origins, "OID@")["OID@"]  # pylint: disable=no-member
+        origin_order = np.argsort(origin_oids)
+        result_rows = origin_order[np.searchsorted(origin_oids, unique_origins, sorter=origin_order)]
+        del unique_origins, origin_order
+
+        # Build a structured array with the statistics for every origin directly from the calculated totals and add it
+        # to the table in one bulk ExtendTable call instead of updating the rows one by one.
+        stat_fields = [("TotalDests", "PercDests")] + [(f"DsAL{perc}Perc", f"PsAL{perc}Perc") for perc in percs]
+        num_dest_array_dtype = {"LONG": "<i4", "DOUBLE": "<f8"}[num_dest_field_type]
+        out_dtype = [("OriginOID", origin_oids.dtype)]
+        for total_field, perc_field in stat_fields:
+            out_dtype += [(total_field, num_dest_array_dtype), (perc_field, "<f8")]
+        out_array = np.zeros(len(origin_oids), dtype=out_dtype)
+        out_array["OriginOID"] = origin_oids
+        # Calculate the total destinations found for each origin using the weight field and the percentage of
+        # destinations reached, and then the number and percentage of destinations accessible at the different
+        # thresholds
+        for idx, (total_field, perc_field) in enumerate(stat_fields):
+            out_array[total_field][result_rows] = totals[:, idx]
+            out_array[perc_field][result_rows] = 100.0 * totals[:, idx] / total_dests
+        del totals, result_rows
 
         # Append the calculated transit frequency statistics to the output feature class
         self.logger.debug("Writing data to output Origins...")
-        arcpy.management.AddFields(self.origins, field_defs)
-        oid_field = arcpy.Describe(self.origins).oidFieldName
-        fields = [oid_field] + [f[0] for f in field_defs]
-        with arcpy.da.UpdateCursor(self.origins, fields) as cur:  # pylint: disable=no-member
-            for row in cur:
-                oid = row[0]
-                try:
-                    new_row = [oid] + output_df.loc[oid].to_list()
-                except KeyError:
-                    # Fill null values with 0 where appropriate if the feature wasn't even in the dataframe.
-                    new_row = [oid] + [0] * len(field_defs)
-                cur.updateRow(new_row)
+        arcpy.da.ExtendTable(self.origins, oid_field, out_array, "OriginOID")  # pylint: disable=no-member
 
         self.logger.info(f"Accessibility statistics fields were added to Origins table {self.origins}.")
 
+    @staticmethod
+    def _group_od_line_files_by_od_ranges(od_line_files):
+        """Group OD Lines files by the origin and destination ObjectID ranges encoded in their file names.
+
+        Args:
+            od_line_files (list(str)): OD Lines files named like ODLines_O_1_1000_D_2001_3000_T_20220428_091500.csv
+
+        Returns:
+            dict: {file name prefix for the origin and destination ranges: [OD Lines files for all times of day]}
+        """
+        groups = {}
+        for od_file in od_line_files:
+            od_ranges_prefix = os.path.basename(od_file).split("_T_")[0]
+            groups.setdefault(od_ranges_prefix, []).append(od_file)
+        return groups
+
+    @staticmethod
+    def _count_times_reached(od_df):
+        """Count the number of times each OD pair appears in a dataframe of OD Lines.
+
+        Args:
+            od_df (pd.DataFrame): Dataframe of OD Lines with OriginOID and DestinationOID columns
+
+        Returns:
+            pd.Series: TimesReached for each OD pair indexed by OriginOID and DestinationOID
+        """
+        if od_df.empty:
+            return od_df.groupby(["OriginOID", "DestinationOID"]).size().rename("TimesReached")
+
+        origin_oids = od_df["OriginOID"].to_numpy(dtype="int64")
+        destination_oids = od_df["DestinationOID"].to_numpy(dtype="int64")
+        min_origin_oid = origin_oids.min()
+        min_destination_oid = destination_oids.min()
+        num_destination_cols = int(destination_oids.max() - min_destination_oid + 1)
+        if int(origin_oids.max() - min_origin_oid + 1) * num_destination_cols <= MAX_DENSE_OD_MATRIX_CELLS:
+            # The chunk's origins and destinations are dense enough to count each OD pair directly in a flattened
+            # origin x destination matrix, which is faster than hashing.
+            cells = (origin_oids - min_origin_oid) * num_destination_cols + (destination_oids - min_destination_oid)
+            counts = np.bincount(cells)
+            reached_cells = np.flatnonzero(counts)
+            index = pd.MultiIndex.from_arrays(
+                [reached_cells // num_destination_cols + min_origin_oid,
+                 reached_cells % num_destination_cols + min_destination_oid],
+                names=["OriginOID", "DestinationOID"]
+            )
+            return pd.Series(counts[reached_cells], index=index, name="TimesReached")
+
+        # A packed key is only unique and can only be unpacked if the DestinationOID is smaller than the multiplier, and
+        # it only fits in an int64 if the OriginOID is small enough
+        max_packable_origin_oid = (np.iinfo("int64").max - (OD_KEY_MULTIPLIER - 1)) // OD_KEY_MULTIPLIER
+        if origin_oids.max() <= max_packable_origin_oid and destination_oids.max() < OD_KEY_MULTIPLIER:
+            # Pack each (OriginOID, DestinationOID) pair into a single int64 key. Counting a single integer column is
+            # much faster than grouping by two columns. The pair is unpacked again afterwards.
+            od_keys = od_df["OriginOID"].astype("int64") * OD_KEY_MULTIPLIER + od_df["DestinationOID"].astype("int64")
+            counts = od_keys.value_counts(sort=False)
+            index = pd.MultiIndex.from_arrays(
+                [counts.index // OD_KEY_MULTIPLIER, counts.index % OD_KEY_MULTIPLIER],
+                names=["OriginOID", "DestinationOID"]
+            )
+            return pd.Series(counts.to_numpy(), index=index, name="TimesReached")
+        # The ObjectIDs are too large to pack into a single int64, so group by both columns. The counts are only
+        # aggregated further, so skip sorting the groups.
+        return od_df.groupby(["OriginOID", "DestinationOID"], sort=False).size().rename("TimesReached")
+
+    @staticmethod
+    def _read_od_lines_file(od_file):
+        """Read an OD Lines file written by a parallel process into a dataframe."""
+        if USE_ARROW:
+            with pa.memory_map(od_file, 'r') as source:
+                batch_reader = pa.ipc.RecordBatchFileReader(source)
+                chunk_table = batch_reader.read_all()
+            return chunk_table.to_pandas(split_blocks=True, zero_copy_only=True)
+        return pd.read_csv(
+            od_file, usecols=["OriginOID", "DestinationOID"], dtype={"OriginOID": int, "DestinationOID": int},
+            engine=CSV_ENGINE
+        )
+
     def _calculate_travel_time_statistics_outputs(self):
         """Calculate travel time statistics and write them to the output file."""
         # NOTE: This method does not support Arrow outputs at this time.  If reimplementing the USE_ARROW option,
@@ -831,6 +1003,19 @@ class ParallelODCalculator():
         if os.path.exists(self.out_csv_file):
             os.remove(self.out_csv_file)
 
+        # Determine the ObjectID field types once since they are the same for every origin range
+        origin_oid_type = int
+        dest_oid_type = int
+        if AnalysisHelpers.arcgis_version >= "3.2":
+            if arcpy.Describe(self.origins).hasOID64:
+                origin_oid_type = pd.Int64Dtype
+            if arcpy.Describe(self.destinations).hasOID64:
+                dest_oid_type = pd.Int64Dtype
+        mapfunc = partial(
+            pd.read_csv,
+            dtype={"OriginOID": origin_oid_type, "DestinationOID": dest_oid_type, "Total_Time": float}
+        )
+
         # Read the output CSV files into a pandas dataframe to calculate statistics
         # Handle each origin range separately to avoid pulling all results into memory at once
         first = True
@@ -844,17 +1029,6 @@ class ParallelODCalculator():
                 # No results for this chunk
                 continue
 
-            origin_oid_type = int
-            dest_oid_type = int
-            if AnalysisHelpers.arcgis_version >= "3.2":
-                if arcpy.Describe(self.origins).hasOID64:
-                    origin_oid_type = pd.Int64Dtype
-                if arcpy.Describe(self.destinations).hasOID64:
-                    dest_oid_type = pd.Int64Dtype
-            mapfunc = partial(
-                pd.read_csv,
-                dtype={"OriginOID": origin_oid_type, "DestinationOID": dest_oid_type, "Total_Time": float}
-            )
             df = pd.concat(map(mapfunc, files_for_origin_range), ignore_index=True)
 
             # Calculate simple stats
@@ -1,7 +1,7 @@
 ############################################################################
 ## Tool name: Transit Network Analysis Tools
 ## Created by: Melinda Morang, Esri
-## Last updated: 20 September 2023
+## Last updated: 17 October 2026
 ############################################################################
 """Run a Service Area analysis incrementing the time of day over a time window.
 Save the output polygons to a single feature class that can be used to generate
@@ -35,6 +35,8 @@ import shutil
 import time
 import traceback
 import argparse
+import itertools
+import collections
 
 import arcpy
 
@@ -47,6 +49,10 @@ DELETE_INTERMEDIATE_SA_OUTPUTS = True  # Set to False for debugging purposes
 # Change logging.INFO to logging.DEBUG to see verbose debug messages
 LOG_LEVEL = logging.INFO
 
+# SA config file properties to set on the solver object. Properties handled explicitly by the tool parameters are
+# filtered out once here instead of every time a solver object is initialized.
+SA_CONFIG_PROPS = {prop: val for prop, val in SA_PROPS.items() if prop not in SA_PROPS_SET_BY_TOOL}
+
 
 class ServiceArea(
     AnalysisHelpers.JobFolderMixin, AnalysisHelpers.LoggingMixin, AnalysisHelpers.MakeNDSLayerMixin
@@ -67,6 +73,7 @@ class ServiceArea(
         - geometry_at_overlap
         - output_folder
         - barriers
+        - barrier_shape_types
         """
         self.facilities = kwargs["facilities"]
         self.network_data_source = kwargs["network_data_source"]
@@ -80,6 +87,8 @@ class ServiceArea(
         self.barriers = []
         if "barriers" in kwargs and kwargs["barriers"]:
             self.barriers = kwargs["barriers"]
+        # Dictionary of {barrier catalog path: shape type} described once up front by the main process
+        self.barrier_shape_types = kwargs.get("barrier_shape_types") or {}
 
         # Create a job ID and a folder for this job
         self._create_job_folder()
@@ -100,12 +109,13 @@ class ServiceArea(
         self.job_result = {
             "jobId": self.job_id,
             "jobFolder": self.job_folder,
+            "timeOfDay": None,
             "solveSucceeded": False,
             "solveMessages": "",
             "logFile": self.log_file
         }
 
-    def initialize_sa_solver(self, time_of_day=None):
+    def initialize_sa_solver(self):
         """Initialize a Service Area solver object and set properties."""
         # For a local network dataset, we need to checkout the Network Analyst extension license.
         if not self.is_service:
@@ -122,14 +132,9 @@ class ServiceArea(
         # The properties have been extracted to the config file to make them easier to find and set so users don't have
         # to dig through the code to change them.
         self.logger.debug("Setting Service Area analysis properties from SA config file...")
-        for prop in SA_PROPS:
-            if prop in SA_PROPS_SET_BY_TOOL:
-                self.logger.warning(
-                    f"SA config file property {prop} is handled explicitly by the tool parameters and will be ignored."
-                )
-                continue
+        for prop, val in SA_CONFIG_PROPS.items():
             try:
-                setattr(self.sa_solver, prop, SA_PROPS[prop])
+                setattr(self.sa_solver, prop, val)
             except Exception as ex:  # pylint: disable=broad-except
                 # Suppress warnings for older services (pre 11.0) that don't support locate settings and services
                 # that don't support accumulating attributes because we don't want the tool to always throw a warning.
@@ -147,13 +152,6 @@ class ServiceArea(
         self.sa_solver.travelDirection = self.travel_direction
         self.sa_solver.geometryAtCutoff = self.geometry_at_cutoff
         self.sa_solver.geometryAtOverlap = self.geometry_at_overlap
-        # Set time of day, which is passed in as an OD solve parameter from our chunking mechanism
-        self.logger.debug("Setting time of day...")
-        self.sa_solver.timeOfDay = time_of_day
-
-        # Ensure the travel mode has impedance units that are time-based.
-        self.logger.debug("Validating travel mode...")
-        self._validate_travel_mode()
 
     def _validate_travel_mode(self):
         """Validate that the travel mode has time units.
@@ -171,28 +169,22 @@ class ServiceArea(
             self.logger.error(err)
             raise ValueError(err)
 
-    def solve(self, time_of_day):
-        """Create and solve a Service Area analysis for the designated time of day.
-
-        Args:
-            time_of_day (datetime): Time of day for this solve
-        """
-        # Initialize the Service Area solver object
-        self.initialize_sa_solver(time_of_day)
+    def _set_up_sa_solver(self):
+        """Initialize the Service Area solver object and do the setup that is the same for every time of day."""
+        self.initialize_sa_solver()
 
         # Add a TimeOfDay field to the facilities.
-        # The field will get passed through to the output polygons.
+        # The field will get passed through to the output polygons, where it is calculated for each solve.
         field_defs = [[AnalysisHelpers.TIME_FIELD, "DATE"]]
         self.sa_solver.addFields(arcpy.nax.ServiceAreaInputDataType.Facilities, field_defs)
 
-        # Load the facilities
+        # Load the facilities. They are the same for every time of day, so they are loaded once and reused for every
+        # solve.
         self.logger.debug("Loading facilities...")
         facilities_field_mappings = self.sa_solver.fieldMappings(
             arcpy.nax.ServiceAreaInputDataType.Facilities,
             True  # Use network location fields
         )
-        # Set the TimeOfDay field value to the start time being used for this analysis
-        facilities_field_mappings[AnalysisHelpers.TIME_FIELD].defaultValue = time_of_day
         self.sa_solver.load(
             arcpy.nax.ServiceAreaInputDataType.Facilities,
             self.facilities,
@@ -203,7 +195,9 @@ class ServiceArea(
         # Load barriers
         for barrier_fc in self.barriers:
             self.logger.debug(f"Loading barriers feature class {barrier_fc}...")
-            shape_type = arcpy.Describe(barrier_fc).shapeType
+            shape_type = self.barrier_shape_types.get(barrier_fc)
+            if shape_type is None:
+                shape_type = arcpy.Describe(barrier_fc).shapeType
             if shape_type == "Polygon":
                 class_type = arcpy.nax.ServiceAreaInputDataType.PolygonBarriers
             elif shape_type == "Polyline":
@@ -218,68 +212,131 @@ class ServiceArea(
             barriers_field_mappings = self.sa_solver.fieldMappings(class_type, True)
             self.sa_solver.load(class_type, barrier_fc, barriers_field_mappings, True)
 
+    def solve(self, time_of_day):
+        """Create and solve a Service Area analysis for the designated time of day.
+
+        The Service Area solver object is created and configured for the first solve and then reused for all later
+        solves run by this object. Only the time of day is updated for each solve.
+
+        Args:
+            time_of_day (datetime): Time of day for this solve
+        """
+        # Reset the result dictionary in case this object was used for an earlier solve
+        self.job_result["timeOfDay"] = time_of_day
+        self.job_result["solveSucceeded"] = False
+        self.job_result["solveMessages"] = ""
+        self.job_result.pop("outputPolygons", None)
+
+        # Initialize the Service Area solver object and do the setup that is the same for every time of day if this is
+        # the first solve
+        if self.sa_solver is None:
+            try:
+                self._set_up_sa_solver()
+            except Exception:
+                # Don't reuse a partially set up solver object for later solves
+                self.sa_solver = None
+                raise
+
+        # Set time of day, which is passed in as an SA solve parameter from our chunking mechanism
+        self.sa_solver.timeOfDay = time_of_day
+
         # Solve the Service Area analysis
-        self.logger.debug("Solving Service Area...")
+        # The worker's log file is shared by all the times of day it solves, so identify the time of day in the log
+        self.logger.debug(f"Solving Service Area for start time {time_of_day}...")
         solve_start = time.time()
         solve_result = self.sa_solver.solve()
         solve_end = time.time()
         self.logger.debug(f"Solving Service Area completed in {round(solve_end - solve_start, 3)} (seconds).")
 
-        # Handle solve messages
-        solve_msgs = [msg[-1] for msg in solve_result.solverMessages(arcpy.nax.MessageSeverity.All)]
-        for msg in solve_msgs:
-            self.logger.debug(msg)
+        # Handle solve messages. They are only reported by the main process when the solve fails, so don't bother
+        # reading them and sending them back for successful solves unless we're debugging.
+        if not solve_result.solveSucceeded or LOG_LEVEL <= logging.DEBUG:
+            solve_msgs = [msg[-1] for msg in solve_result.solverMessages(arcpy.nax.MessageSeverity.All)]
+            # Log all the messages as one record instead of one record per message
+            if solve_msgs:
+                self.logger.debug("\n".join(solve_msgs))
+            # Consolidate repeated messages so they don't clog up the output when the main process reports them
+            self.job_result["solveMessages"] = [
+                f"{msg} (repeated {count} times)" if count > 1 else msg
+                for msg, count in collections.Counter(solve_msgs).items()
+            ]
 
         # Update the result dictionary
-        self.job_result["solveMessages"] = solve_msgs
         if not solve_result.solveSucceeded:
             self.logger.debug("Solve failed.")
             return
         self.logger.debug("Solve succeeded.")
         self.job_result["solveSucceeded"] = True
 
-        # Export the Service Area polygons output to a feature class
+        # Export the Service Area polygons output to a feature class. The name must be unique because the output gdb is
+        # shared by all solves run by this object.
         out_gdb = self._create_output_gdb()
-        output_polygons = os.path.join(out_gdb, "output_polygons")
+        output_polygons = os.path.join(out_gdb, "output_polygons_" + uuid.uuid4().hex)
         self.logger.debug(f"Exporting Service Area polygons output to {output_polygons}...")
         solve_result.export(arcpy.nax.ServiceAreaOutputDataType.Polygons, output_polygons)
 
-        # Do special handling if the geometry type is Dissolve because the time of day field cannot be passed
-        # through from the inputs. Add it explicitly and calculate it.
+        # Calculate the time of day field on the output polygons. The facilities are loaded once for all the times of
+        # day, so the field passed through from the facilities is empty. Do special handling if the geometry type is
+        # Dissolve because the time of day field cannot be passed through from the inputs. Add it explicitly.
         if self.geometry_at_overlap == arcpy.nax.ServiceAreaOverlapGeometry.Dissolve:
             AnalysisHelpers.run_gp_tool(
                 self.logger,
                 arcpy.management.AddField,
                 [output_polygons, AnalysisHelpers.TIME_FIELD, "DATE"]
             )
-            # Use UpdateCursor instead of CalculateField to avoid having to represent the datetime as a string
-            with arcpy.da.UpdateCursor(  # pylint: disable=no-member
-                output_polygons, [AnalysisHelpers.TIME_FIELD]
-            ) as cur:
-                for _ in cur:
-                    cur.updateRow([time_of_day])
+        # Use UpdateCursor instead of CalculateField to avoid having to represent the datetime as a string
+        with arcpy.da.UpdateCursor(  # pylint: disable=no-member
+            output_polygons, [AnalysisHelpers.TIME_FIELD]
+        ) as cur:
+            for _ in cur:
+                cur.updateRow([time_of_day])
 
         self.job_result["outputPolygons"] = output_polygons
         self.logger.debug("Finished calculating Service Area.")
 
 
-def solve_service_area(time_of_day, inputs):
-    """Solve a Service Area analysis for the given time of day.
+def solve_service_area(times_of_day, inputs=None):
+    """Solve a Service Area analysis for each of the given times of day.
+
+    The times of day are solved one after another with the same ServiceArea object. If the worker process was set up
+    with AnalysisHelpers.initialize_worker(), the worker's ServiceArea object, including its job folder, logger,
+    network dataset layer, and solver object, is reused for every job the worker handles.
 
     Args:
-        time_of_day (datetime.datetime): Start time and date for the Service Area
-        inputs (dict): Dictionary of keyword inputs suitable for initializing the ServiceArea class
+        times_of_day (list(datetime.datetime)): Start times and dates for the Service Areas
+        inputs (dict, optional): Dictionary of keyword inputs suitable for initializing the ServiceArea class. Only
+            used if the worker process was not set up with AnalysisHelpers.initialize_worker().
 
     Returns:
-        dict: Dictionary of results from the ServiceArea class
+        list(dict): Dictionary of results from the ServiceArea class for each time of day. The successful results all
+            point to the same output polygons feature class, which contains the polygons for all the times of day.
     """
-    sa = ServiceArea(**inputs)
+    sa, is_worker_sa = AnalysisHelpers.get_worker_object(ServiceArea, inputs)
     sa.logger.info((
-        f"Processing start time {time_of_day} as job id {sa.job_id}"
+        f"Processing start times {times_of_day[0]} to {times_of_day[-1]} as job id {sa.job_id}"
     ))
-    sa.solve(time_of_day)
-    sa.teardown_logger()
-    return sa.job_result
+    job_results = []
+    for time_of_day in times_of_day:
+        sa.solve(time_of_day)
+        job_results.append(dict(sa.job_result))
+    # Append the polygons from all the successful solves in this job into the first output feature class so the main
+    # process has one feature class per job to merge instead of one per time of day. The outputs all have the same
+    # schema, so field matching can be skipped. Delete the appended feature classes so the polygons aren't stored twice.
+    output_polygons = [result["outputPolygons"] for result in job_results if result["solveSucceeded"]]
+    if len(output_polygons) > 1:
+        sa.logger.debug(f"Appending Service Area polygons for job id {sa.job_id} into {output_polygons[0]}...")
+        AnalysisHelpers.run_gp_tool(
+            sa.logger, arcpy.management.Append, [output_polygons[1:], output_polygons[0], "NO_TEST"])
+        AnalysisHelpers.run_gp_tool(sa.logger, arcpy.management.Delete, [output_polygons[1:]])
+        for result in job_results:
+            if result["solveSucceeded"]:
+                result["outputPolygons"] = output_polygons[0]
+    if is_worker_sa:
+        # The worker's log file stays open for later solves, so write out the messages logged for these solves
+        sa.flush_logger()
+    else:
+        sa.teardown_logger()
+    return job_results
 
 
 class ParallelSACalculator():
@@ -326,6 +383,19 @@ class ParallelSACalculator():
             barriers = []
         self.max_processes = max_processes
 
+        # Describe the barriers once here instead of in every parallel process, and drop any with an invalid shape type
+        # so the warning is only issued once
+        barrier_shape_types = {}
+        for barrier_fc in barriers:
+            shape_type = arcpy.Describe(barrier_fc).shapeType
+            if shape_type not in ("Polygon", "Polyline", "Point"):
+                self.logger.warning(
+                    f"Barrier feature class {barrier_fc} has an invalid shape type and will be ignored."
+                )
+                continue
+            barrier_shape_types[barrier_fc] = shape_type
+        barriers = list(barrier_shape_types)
+
         # Validate time window inputs and convert them into a list of times of day to run the analysis
         try:
             self.start_times = AnalysisHelpers.make_analysis_time_of_day_list(
@@ -338,6 +408,11 @@ class ParallelSACalculator():
             self.logger.error(str(ex))
             raise ValueError from ex
 
+        # Split the start times into contiguous groups. Each group is one parallel job, and its times of day are solved
+        # one after another by the same process.
+        self.start_time_groups = AnalysisHelpers.split_list_into_groups(
+            self.start_times, self.max_processes * AnalysisHelpers.TIME_GROUPS_PER_PROCESS)
+
         # Scratch folder to store intermediate outputs from the Service Area processes
         unique_id = uuid.uuid4().hex
         self.scratch_folder = os.path.join(
@@ -361,7 +436,8 @@ class ParallelSACalculator():
             "network_data_source": network_data_source,
             "travel_mode": travel_mode,
             "output_folder": self.scratch_folder,
-            "barriers": barriers
+            "barriers": barriers,
+            "barrier_shape_types": barrier_shape_types
         }
 
     def _validate_sa_settings(self):
@@ -369,10 +445,18 @@ class ParallelSACalculator():
         # Create a dummy ServiceArea object and set properties. This allows us to detect any errors prior to spinning up
         # a bunch of parallel processes and having them all fail.
         self.logger.debug("Validating Service Area settings...")
+        for prop in SA_PROPS:
+            if prop in SA_PROPS_SET_BY_TOOL:
+                self.logger.warning(
+                    f"SA config file property {prop} is handled explicitly by the tool parameters and will be ignored."
+                )
         sa = None
         try:
             sa = ServiceArea(**self.sa_inputs)
             sa.initialize_sa_solver()
+            # Ensure the travel mode has impedance units that are time-based. The travel mode is the same for every
+            # solve, so this only needs to be checked once here and not again in each parallel process.
+            sa._validate_travel_mode()  # pylint: disable=protected-access
             self.logger.debug("Service Area settings successfully validated.")
         except Exception:
             self.logger.error("Error initializing Service Area analysis.")
@@ -396,17 +480,22 @@ class ParallelSACalculator():
 
         # Compute Service Areas in parallel
         job_results = AnalysisHelpers.run_parallel_processes(
-            self.logger, solve_service_area, [self.sa_inputs], self.start_times,
-            len(self.start_times), self.max_processes,
-            "Solving Service Areas", "Service Area"
+            self.logger, solve_service_area, [], self.start_time_groups,
+            len(self.start_time_groups), self.max_processes,
+            "Solving Service Areas", "Service Area",
+            initializer=AnalysisHelpers.initialize_worker, initargs=(self.sa_inputs,)
         )
 
-        # Parse the results and store components for post-processing.
-        for result in job_results:
+        # Parse the results and store components for post-processing. Each job returns a list of results, one for each
+        # time of day.
+        for result in itertools.chain.from_iterable(job_results):
             if result["solveSucceeded"]:
-                self.sa_poly_fcs.append(result["outputPolygons"])
+                # All the successful solves in a job share one output feature class, so only add it once
+                if result["outputPolygons"] not in self.sa_poly_fcs:
+                    self.sa_poly_fcs.append(result["outputPolygons"])
             else:
-                self.logger.warning(f"Solve failed for job id {result['jobId']}")
+                # The job ID is shared by all the solves in a worker process, so identify the failed time of day too
+                self.logger.warning(f"Solve failed for job id {result['jobId']} and start time {result['timeOfDay']}")
                 msgs = result["solveMessages"]
                 self.logger.warning(msgs)
 
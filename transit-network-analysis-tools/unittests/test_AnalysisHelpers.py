@@ -224,6 +224,15 @@ class TestHelpers(unittest.TestCase):
             tod_list
         )
 
+    def test_split_list_into_groups(self):
+        """Test the split_list_into_groups function."""
+        items = [1, 2, 3, 4, 5]
+        self.assertEqual([[1, 2, 3], [4, 5]], AnalysisHelpers.split_list_into_groups(items, 2))
+        self.assertEqual([[1, 2, 3, 4, 5]], AnalysisHelpers.split_list_into_groups(items, 1))
+        self.assertEqual([[1], [2], [3], [4], [5]], AnalysisHelpers.split_list_into_groups(items, 10))
+        self.assertEqual([[1, 2, 3, 4, 5]], AnalysisHelpers.split_list_into_groups(items, 0))
+        self.assertEqual([], AnalysisHelpers.split_list_into_groups([], 3))
+
     def test_convert_inputs_to_datetimes(self):
         """Test the convert_inputs_to_datetimes function."""
         # Test a generic weekday
@@ -296,6 +305,50 @@ class TestHelpers(unittest.TestCase):
         AnalysisHelpers.run_gp_tool(
             logger, arcpy.management.CreateFileGDB, [self.scratch_folder], {"out_name": "testRunTool.gdb"})
 
+    def test_get_worker_object(self):
+        """Test the initialize_worker and get_worker_object functions."""
+        def factory(value):
+            return {"value": value}
+
+        try:
+            # Without a worker initializer, a new object is created from the given inputs every time
+            obj1, is_worker_obj = AnalysisHelpers.get_worker_object(factory, {"value": 1})
+            obj2, _ = AnalysisHelpers.get_worker_object(factory, {"value": 1})
+            self.assertEqual({"value": 1}, obj1)
+            self.assertFalse(is_worker_obj)
+            self.assertIsNot(obj1, obj2)
+            # With a worker initializer, the object is created from the worker's inputs once and reused
+            AnalysisHelpers.initialize_worker({"value": 2})
+            self.assertNotIn(factory, AnalysisHelpers.WORKER_CACHE, "Object should not be created by the initializer.")
+            obj1, is_worker_obj = AnalysisHelpers.get_worker_object(factory, {"value": 1})
+            obj2, _ = AnalysisHelpers.get_worker_object(factory)
+            self.assertEqual({"value": 2}, obj1)
+            self.assertTrue(is_worker_obj)
+            self.assertIs(obj1, obj2)
+        finally:
+            AnalysisHelpers.WORKER_CACHE.clear()
+
+    def test_BufferedFileHandler(self):
+        """Test the BufferedFileHandler class."""
+        log_file = os.path.join(self.scratch_folder, "test_BufferedFileHandler.log")
+        logger = logging.getLogger("test_BufferedFileHandler")  # pylint:disable=invalid-name
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(AnalysisHelpers.BufferedFileHandler(log_file, encoding="utf-8"))
+        # Debug messages are buffered
+        logger.debug("Debug message")
+        with open(log_file, "r", encoding="utf-8") as f:
+            self.assertEqual("", f.read())
+        # Warnings flush the buffer
+        logger.warning("Warning message")
+        with open(log_file, "r", encoding="utf-8") as f:
+            self.assertEqual("Debug message\nWarning message\n", f.read())
+        # Closing the logger writes any remaining messages
+        logger.debug("Another debug message")
+        AnalysisHelpers.teardown_logger(logger)
+        self.assertEqual([], logger.handlers)
+        with open(log_file, "r", encoding="utf-8") as f:
+            self.assertEqual("Debug message\nWarning message\nAnother debug message\n", f.read())
+
     def test_get_locatable_network_source_names(self):
         """Test the get_locatable_network_source_names function."""
         self.assertEqual(
@@ -17,6 +17,8 @@ import sys
 import os
 import datetime
 import unittest
+from unittest import mock
+import numpy as np
 import pandas as pd
 from copy import deepcopy
 from glob import glob
@@ -143,16 +145,71 @@ class TestParallelODCM(unittest.TestCase):
         row_count = pd.read_csv(expected_out_file).shape[0]
         self.assertEqual(12, row_count, "OD line CSV file has an incorrect number of rows.")
 
+    def test_ODCostMatrix_solve_reuse(self):
+        """Test solving several chunks with the same ODCostMatrix object."""
+        out_folder = os.path.join(self.scratch_folder, "ODCostMatrix_Reuse")
+        os.makedirs(out_folder)
+        od_inputs = deepcopy(self.od_args)
+        od_inputs["od_output_location"] = out_folder
+        od = parallel_odcm.ODCostMatrix(**od_inputs)
+        origins_type = arcpy.nax.OriginDestinationCostMatrixInputDataType.Origins
+        dests_type = arcpy.nax.OriginDestinationCostMatrixInputDataType.Destinations
+        time_of_day = datetime.datetime(1900, 1, 3, 10, 0, 0)
+
+        # Solve a chunk
+        first_chunk = ([1, 3], [11, 15])  # 3 origins and 4 destinations with <= 10 jobs
+        od.solve(*first_chunk, time_of_day)
+        self.assertTrue(od.job_result["solveSucceeded"], "OD solve failed")
+        self.assertEqual(first_chunk, od.loaded_criteria)
+        self.assertEqual(12, pd.read_csv(od.job_result["outputLines"]).shape[0])
+
+        # Solving a different chunk reselects and reloads the inputs
+        second_chunk = ([4, 6], [11, 15])
+        with mock.patch.object(od, "_load_inputs", wraps=od._load_inputs) as load_inputs:
+            od.solve(*second_chunk, time_of_day)
+        load_inputs.assert_called_once_with(*second_chunk)
+        self.assertTrue(od.job_result["solveSucceeded"], "OD solve failed")
+        self.assertEqual(second_chunk, od.loaded_criteria)
+        num_origins = int(arcpy.management.GetCount(od.input_origins_layer_obj).getOutput(0))
+        num_dests = int(arcpy.management.GetCount(od.input_destinations_layer_obj).getOutput(0))
+        self.assertEqual(num_origins, od.od_solver.count(origins_type), "Origins were not replaced.")
+        self.assertEqual(num_dests, od.od_solver.count(dests_type), "Destinations were not replaced.")
+        # The reused object gets the same result as a new object solving the same chunk
+        fresh_inputs = deepcopy(od_inputs)
+        fresh_inputs["od_output_location"] = os.path.join(out_folder, "Fresh")
+        os.makedirs(fresh_inputs["od_output_location"])
+        fresh_od = parallel_odcm.ODCostMatrix(**fresh_inputs)
+        fresh_od.solve(*second_chunk, time_of_day)
+        self.assertEqual(
+            pd.read_csv(fresh_od.job_result["outputLines"]).shape[0],
+            pd.read_csv(od.job_result["outputLines"]).shape[0],
+            "Incorrect number of rows for the second chunk."
+        )
+
+        # Solving the same chunk again at another time of day reuses the loaded inputs without duplicating them
+        od.solve(*first_chunk, time_of_day)
+        with mock.patch.object(od, "_load_inputs", wraps=od._load_inputs) as load_inputs:
+            od.solve(*first_chunk, datetime.datetime(1900, 1, 3, 10, 1, 0))
+        load_inputs.assert_not_called()
+        self.assertTrue(od.job_result["solveSucceeded"], "OD solve failed")
+        self.assertEqual(3, od.od_solver.count(origins_type), "Incorrect number of origins loaded.")
+        self.assertEqual(4, od.od_solver.count(dests_type), "Incorrect number of destinations loaded.")
+        self.assertEqual(12, pd.read_csv(od.job_result["outputLines"]).shape[0])
+
     def test_solve_od_cost_matrix(self):
         """Test the solve_od_cost_matrix function."""
-        result = parallel_odcm.solve_od_cost_matrix(
-            [[1, 3], [11, 15], datetime.datetime(1900, 1, 3, 10, 0, 0)], self.od_args)
+        times_of_day = [datetime.datetime(1900, 1, 3, 10, 0, 0), datetime.datetime(1900, 1, 3, 10, 1, 0)]
+        results = parallel_odcm.solve_od_cost_matrix([[1, 3], [11, 15], times_of_day], self.od_args)
         # Check results
-        self.assertIsInstance(result, dict)
-        self.assertTrue(os.path.exists(result["logFile"]), "Log file does not exist.")
-        self.assertTrue(result["solveSucceeded"], "OD solve failed")
-        self.assertTrue(arcpy.Exists(result["outputLines"]), "OD line output does not exist.")
-        self.assertEqual(12, int(arcpy.management.GetCount(result["outputLines"]).getOutput(0)))
+        self.assertIsInstance(results, list)
+        self.assertEqual(len(times_of_day), len(results), "Incorrect number of results.")
+        for result in results:
+            self.assertIsInstance(result, dict)
+            self.assertTrue(os.path.exists(result["logFile"]), "Log file does not exist.")
+            self.assertTrue(result["solveSucceeded"], "OD solve failed")
+            self.assertTrue(arcpy.Exists(result["outputLines"]), "OD line output does not exist.")
+            self.assertEqual(12, int(arcpy.management.GetCount(result["outputLines"]).getOutput(0)))
+        self.assertNotEqual(results[0]["outputLines"], results[1]["outputLines"])
 
     def test_ParallelODCalculator_validate_od_settings(self):
         """Test the _validate_od_settings function."""
@@ -166,6 +223,11 @@ class TestParallelODCM(unittest.TestCase):
         error_type = ValueError if AnalysisHelpers.arcgis_version >= "3.1" else RuntimeError
         with self.assertRaises(error_type):
             od_calculator._validate_od_settings()
+        # Test invalid tool
+        od_calculator = parallel_odcm.ParallelODCalculator(**self.parallel_od_class_args)
+        od_calculator.tool = "InvalidTool"
+        with self.assertRaises(ValueError):
+            od_calculator._validate_od_settings()
 
     def test_ParallelODCalculator_solve_od_in_parallel_cam_weight(self):
         """Test Calculate Accessibility Matrix tool solving and post-processing using a weight field."""
@@ -304,6 +366,133 @@ class TestParallelODCM(unittest.TestCase):
                     f"Wrong value in row {i} for field {self.expected_cam_fields[j - 1]}"
                 )
 
+    def test_group_od_line_files_by_od_ranges(self):
+        """Test grouping the OD Lines files for all times of day by their origin and destination ranges."""
+        # List the files by time of day so the files for each OD range pair are not adjacent
+        od_line_files = sorted(
+            glob(os.path.join(self.input_data_folder, "CAM_PostProcessing", "*.csv")),
+            key=lambda f: os.path.basename(f).split("_T_")[1]
+        )
+        groups = parallel_odcm.ParallelODCalculator._group_od_line_files_by_od_ranges(od_line_files)
+        expected_groups = {
+            "ODLines_O_1_2_D_1_2": ["080000", "080100", "080200", "080300"],
+            "ODLines_O_1_2_D_3_4": ["080000", "080100", "080200", "080300"],
+            "ODLines_O_3_4_D_1_2": ["080000", "080100", "080200"],
+            "ODLines_O_3_4_D_3_4": ["080000", "080100", "080200"]
+        }
+        self.assertEqual(
+            expected_groups,
+            {prefix: sorted(os.path.splitext(f)[0][-6:] for f in files) for prefix, files in groups.items()}
+        )
+
+        # Counting TimesReached one OD range group at a time gives the same counts as counting all OD Lines at once
+        all_od_df = pd.concat([pd.read_csv(f) for f in od_line_files], ignore_index=True)
+        expected_counts = all_od_df.groupby(["OriginOID", "DestinationOID"]).size()
+        chunk_counts = pd.concat([
+            parallel_odcm.ParallelODCalculator._count_times_reached(
+                pd.concat([pd.read_csv(f) for f in files], ignore_index=True))
+            for files in groups.values()
+        ])
+        self.assertEqual(expected_counts.to_dict(), chunk_counts.to_dict())
+
+        # The accessibility outputs calculated from the grouped files match the known outputs
+        expected_unweighted_values = [
+            (1, 4, 100.0, 4, 4, 4, 4, 4, 4, 4, 4, 4, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0),
+            (2, 0, 0.0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            (3, 4, 100.0, 4, 4, 4, 4, 4, 0, 0, 0, 0, 100.0, 100.0, 100.0, 100.0, 100.0, 0.0, 0.0, 0.0, 0.0),
+            (4, 3, 75.0, 3, 3, 2, 2, 2, 1, 1, 0, 0, 75.0, 75.0, 50.0, 50.0, 50.0, 25.0, 25.0, 0.0, 0.0)
+        ]
+        expected_weighted_values = [  # Note: Rounded
+            (1, 35, 100.0, 35, 35, 35, 35, 35, 35, 35, 35, 35, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0, 100.0),
+            (2, 0, 0.0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+            (3, 35, 100.0, 35, 35, 35, 35, 35, 0, 0, 0, 0, 100.0, 100.0, 100.0, 100.0, 100.0, 0.0, 0.0, 0.0, 0.0),
+            (4, 35, 100.0, 35, 35, 25, 25, 25, 20, 20, 0, 0, 100.0, 100.0, 71.4, 71.4, 71.4, 57.1, 57.1, 0.0, 0.0)
+        ]
+        for weight_field, expected_values in [
+            (None, expected_unweighted_values),
+            ("NumJobs", expected_weighted_values)
+        ]:
+            with self.subTest(weight_field=weight_field):
+                test_origins = os.path.join(self.output_gdb, f"Origins_CAM_grouped_pp_{weight_field}")
+                arcpy.management.Copy(self.origins_subset, test_origins)
+                od_inputs = deepcopy(self.parallel_od_class_args)
+                od_inputs["origins"] = test_origins
+                od_inputs["destinations"] = self.destinations_subset
+                od_inputs["weight_field"] = weight_field
+                od_calculator = parallel_odcm.ParallelODCalculator(**od_inputs)
+                od_calculator.od_line_files = od_line_files
+                od_calculator._calculate_accessibility_matrix_outputs()
+                actual_values = []
+                for row in arcpy.da.SearchCursor(test_origins, ["OID@"] + self.expected_cam_fields):
+                    actual_values.append(row)
+                self.assertEqual(len(expected_values), len(actual_values), "Wrong number of origins")
+                for i, e_row in enumerate(expected_values):
+                    for j, e_val in enumerate(e_row):
+                        self.assertAlmostEqual(
+                            e_val, actual_values[i][j], 1,
+                            f"Wrong value in row {i} for field {self.expected_cam_fields[j - 1]}"
+                        )
+
+    def check_count_times_reached(self, od_df, counting_method):
+        """Check that _count_times_reached uses the designated counting method and matches a plain groupby count.
+
+        Args:
+            od_df (pd.DataFrame): Dataframe of OD Lines with OriginOID and DestinationOID columns
+            counting_method (str): "bincount", "value_counts", or "groupby"
+        """
+        expected = od_df.groupby(["OriginOID", "DestinationOID"]).size()
+        if counting_method == "bincount":
+            patcher = mock.patch.object(np, "bincount", wraps=np.bincount)
+        else:
+            target = pd.Series if counting_method == "value_counts" else pd.DataFrame
+            patcher = mock.patch.object(
+                target, counting_method, autospec=True, side_effect=getattr(target, counting_method))
+        with patcher as patched_method:
+            actual = parallel_odcm.ParallelODCalculator._count_times_reached(od_df)
+        patched_method.assert_called()
+        self.assertEqual("TimesReached", actual.name)
+        self.assertEqual(expected.to_dict(), actual.to_dict())
+
+    def test_count_times_reached(self):
+        """Test that each way of counting TimesReached in _count_times_reached gives the same counts."""
+        od_df = pd.DataFrame({
+            "OriginOID": [1, 1, 1, 2, 2, 3, 5, 5, 5, 5, 9],
+            "DestinationOID": [11, 11, 12, 11, 15, 12, 12, 12, 15, 11, 20]
+        })
+        # Small OID ranges are counted in a dense matrix
+        self.check_count_times_reached(od_df, "bincount")
+        with mock.patch.object(parallel_odcm, "MAX_DENSE_OD_MATRIX_CELLS", 0):
+            # Too many cells for a dense matrix, so count packed int64 keys
+            self.check_count_times_reached(od_df, "value_counts")
+            # DestinationOIDs too large to pack, so fall back to groupby
+            with mock.patch.object(parallel_odcm, "OD_KEY_MULTIPLIER", 8):
+                self.check_count_times_reached(od_df, "groupby")
+
+    def test_count_times_reached_max_packable_oids(self):
+        """Test that _count_times_reached only packs OD pairs into int64 keys when the ObjectIDs fit."""
+        max_origin_oid = (np.iinfo("int64").max - (parallel_odcm.OD_KEY_MULTIPLIER - 1)) // \
+            parallel_odcm.OD_KEY_MULTIPLIER
+        max_dest_oid = parallel_odcm.OD_KEY_MULTIPLIER - 1
+        with mock.patch.object(parallel_odcm, "MAX_DENSE_OD_MATRIX_CELLS", 0):
+            # The largest ObjectIDs that can be packed
+            od_df = pd.DataFrame({
+                "OriginOID": [1, max_origin_oid, max_origin_oid, max_origin_oid],
+                "DestinationOID": [1, max_dest_oid, max_dest_oid, 1]
+            })
+            self.check_count_times_reached(od_df, "value_counts")
+            # OriginOID too large to pack
+            od_df = pd.DataFrame({
+                "OriginOID": [1, max_origin_oid + 1, max_origin_oid + 1],
+                "DestinationOID": [1, 2, 2]
+            })
+            self.check_count_times_reached(od_df, "groupby")
+            # DestinationOID too large to pack
+            od_df = pd.DataFrame({
+                "OriginOID": [1, 2, 2],
+                "DestinationOID": [1, max_dest_oid + 1, max_dest_oid + 1]
+            })
+            self.check_count_times_reached(od_df, "groupby")
+
     def test_calculate_travel_time_statistics_outputs(self):
         """Test the Calculate Travel Time Statistics tool post-processing."""
         test_origins = os.path.join(self.output_gdb, "Origins_CTTS_pp")
@@ -138,6 +138,73 @@ class TestParallelSA(unittest.TestCase):
         # 4 facilities (dissolved), 2 cutoffs, 1 time slice = 2 total output polygons
         self.check_ServiceArea_solve(sa_inputs, 2)
 
+    def check_solve_service_area(self, sa_inputs, expected_num_polygons_per_time):
+        """Test the solve_service_area function for several times of day."""
+        os.makedirs(sa_inputs["output_folder"])
+        times_of_day = [datetime.datetime(1900, 1, 3, 10, 0, 0), datetime.datetime(1900, 1, 3, 10, 1, 0)]
+        results = parallel_sa.solve_service_area(times_of_day, sa_inputs)
+        # Check results
+        self.assertIsInstance(results, list)
+        self.assertEqual(len(times_of_day), len(results), "Incorrect number of results.")
+        for result, time_of_day in zip(results, times_of_day):
+            self.assertIsInstance(result, dict)
+            self.assertTrue(result["solveSucceeded"], "SA solve failed")
+            self.assertEqual(time_of_day, result["timeOfDay"], "Incorrect time of day in result.")
+        # The polygons for all the times of day are appended into one feature class
+        out_polygons = {result["outputPolygons"] for result in results}
+        self.assertEqual(1, len(out_polygons), "Results do not share one output feature class.")
+        out_polygons = out_polygons.pop()
+        self.assertTrue(arcpy.Exists(out_polygons), "Output SA polygons feature class does not exist.")
+        with arcpy.EnvManager(workspace=os.path.dirname(out_polygons)):
+            self.assertEqual(
+                [os.path.basename(out_polygons)], arcpy.ListFeatureClasses(),
+                "The appended SA polygons feature classes were not deleted.")
+        self.assertEqual(
+            expected_num_polygons_per_time * len(times_of_day),
+            int(arcpy.management.GetCount(out_polygons).getOutput(0)),
+            "Output SA polygons feature class has an incorrect number of rows.")
+        out_times = [row[0] for row in arcpy.da.SearchCursor(out_polygons, [AnalysisHelpers.TIME_FIELD])]
+        for time_of_day in times_of_day:
+            self.assertEqual(
+                expected_num_polygons_per_time, out_times.count(time_of_day),
+                f"Incorrect number of polygons for time of day {time_of_day}.")
+
+    def test_solve_service_area(self):
+        """Test the solve_service_area function with several times of day."""
+        sa_inputs = {
+            "facilities": self.facilities,
+            "cutoffs": [30, 45],
+            "time_units": arcpy.nax.TimeUnits.Minutes,
+            "travel_direction": arcpy.nax.TravelDirection.FromFacility,
+            "geometry_at_cutoff": arcpy.nax.ServiceAreaPolygonCutoffGeometry.Rings,
+            "geometry_at_overlap": arcpy.nax.ServiceAreaOverlapGeometry.Overlap,
+            "network_data_source": self.local_nd,
+            "travel_mode": self.local_tm_time,
+            "output_folder": os.path.join(self.scratch_folder, "SolveServiceArea")
+        }
+        # 4 facilities, 2 cutoffs = 8 output polygons per time slice
+        self.check_solve_service_area(sa_inputs, self.num_facilities * len(sa_inputs["cutoffs"]))
+
+    def test_solve_service_area_dissolve(self):
+        """Test the solve_service_area function with several times of day using dissolved polygons.
+
+        The time of day field is added to the output after each solve in this case, so check that every time of day
+        gets it.
+        """
+        sa_inputs = {
+            "facilities": self.facilities,
+            "cutoffs": [30, 45],
+            "time_units": arcpy.nax.TimeUnits.Minutes,
+            "travel_direction": arcpy.nax.TravelDirection.FromFacility,
+            "geometry_at_cutoff": arcpy.nax.ServiceAreaPolygonCutoffGeometry.Rings,
+            "geometry_at_overlap": arcpy.nax.ServiceAreaOverlapGeometry.Dissolve,
+            "network_data_source": self.local_nd,
+            "travel_mode": self.local_tm_time,
+            "output_folder": os.path.join(self.scratch_folder, "SolveServiceAreaDissolve")
+        }
+        # 4 facilities (dissolved), 2 cutoffs = 2 output polygons per time slice
+        self.check_solve_service_area(sa_inputs, len(sa_inputs["cutoffs"]))
+
     def test_ParallelSACalculator_validate_sa_settings(self):
         """Test the _validate_sa_settings function."""
         # Test that with good inputs, nothing should happen